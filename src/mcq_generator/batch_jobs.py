@@ -0,0 +1,382 @@
+import os
+import sys
+import json
+import time
+import hashlib
+from abc import ABC, abstractmethod
+from openai import OpenAI
+from mdx_reader import LocalMDXReader, MCQGenerator, question_output_path, load_api_key
+from mdx_chunker import pack_documents
+from response_cache import ResponseCache
+from manifest import GenerationManifest
+
+
+# Endpoint every batch line targets
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+# Batch states after which polling stops
+FINISHED_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchPlanner(MCQGenerator):
+    def __init__(self, cache: ResponseCache = None, model: str = "gpt-4", temperature: float = 0.0):
+        """
+        Generator that records every request it would send instead of sending it.
+
+        Runs the normal page, section and packing logic, so the planned requests
+        are exactly those an interactive run would make; cache hits are skipped
+        and identical prompts are only planned once.
+
+        Args:
+            cache: Response cache consulted for hits (it is never written to)
+            model: Model name written into each request body
+            temperature: Sampling temperature written into each request body
+        """
+        super().__init__(None, cache=cache)
+        self.model = model
+        self.temperature = temperature
+        self.requests = {}
+
+    def create_client(self, api_key):
+        # Requests are written to a batch file, never sent
+        return None
+
+    def cache_store(self, key, questions):
+        pass
+
+    def custom_id(self, prompt: str, num_questions: int) -> str:
+        """Stable id for a request: the same content-addressed key the response cache uses."""
+        return ResponseCache.make_key(self.model, prompt, self.temperature, num_questions)
+
+    def complete(self, prompt: str, num_questions: int):
+        custom_id = self.custom_id(prompt, num_questions)
+        self.requests[custom_id] = {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_URL,
+            "body": {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": self.temperature,
+            },
+        }
+        return None
+
+
+class BatchReplay(BatchPlanner):
+    def __init__(self, contents, cache: ResponseCache = None, model: str = "gpt-4", temperature: float = 0.0):
+        """
+        Generator that answers each request from a finished batch's results.
+
+        Replaying the same pages demultiplexes the results into per-page question
+        lists, splitting packed responses and merging sections as a live run would,
+        and stores every parsed response in the cache.
+
+        Args:
+            contents: Mapping of custom_id to the message content returned for it
+            cache: Response cache to fill
+            model: Model name the batch was planned with
+            temperature: Temperature the batch was planned with
+        """
+        super().__init__(cache, model, temperature)
+        self.contents = contents
+
+    def cache_store(self, key, questions):
+        MCQGenerator.cache_store(self, key, questions)
+
+    def complete(self, prompt: str, num_questions: int):
+        return self.contents.get(self.custom_id(prompt, num_questions))
+
+
+def write_batch_file(requests, directory=".mcq_batches"):
+    """
+    Write planned requests as one JSONL batch input file.
+
+    The file is named after a hash of its contents, so resubmitting an
+    unchanged plan reuses the same file.
+
+    Args:
+        requests (iterable): Batch request lines from BatchPlanner.requests
+        directory (str): Directory for batch files
+
+    Returns:
+        str: Path of the written file
+    """
+    lines = [json.dumps(request, separators=(",", ":")) + "\n" for request in requests]
+    digest = hashlib.sha256("".join(lines).encode("utf-8")).hexdigest()[:16]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"batch-{digest}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    return path
+
+
+def parse_batch_output(lines):
+    """
+    Pull the message content for each successful request out of batch output lines.
+
+    Args:
+        lines (iterable): JSONL lines in the batch API's output format
+
+    Returns:
+        tuple: ({custom_id: content}, {custom_id: error description} for failed requests)
+    """
+    contents, errors = {}, {}
+    for line in lines:
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            errors[result["custom_id"]] = result.get("error") or response.get("status_code")
+            continue
+        contents[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return contents, errors
+
+
+class BatchTransport(ABC):
+    """Where batch files are sent: submit a JSONL file, poll its status, fetch its output lines."""
+
+    @abstractmethod
+    def submit(self, input_path):
+        """Submit a batch input file and return the job id."""
+
+    @abstractmethod
+    def status(self, job_id):
+        """Return the job's state, e.g. "in_progress" or one of FINISHED_STATES."""
+
+    @abstractmethod
+    def output_lines(self, job_id):
+        """Return the output JSONL lines of a completed job."""
+
+
+class OpenAIBatchTransport(BatchTransport):
+    def __init__(self, client=None, completion_window="24h"):
+        """
+        Transport for the OpenAI Batch API, or any server implementing it.
+
+        Args:
+            client: OpenAI client; pass one with ``base_url`` set to use a compatible local server
+            completion_window (str): Deadline the job must finish within
+        """
+        self.client = client or OpenAI(api_key=load_api_key())
+        self.completion_window = completion_window
+
+    def submit(self, input_path):
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, job_id):
+        return self.client.batches.retrieve(job_id).status
+
+    def output_lines(self, job_id):
+        batch = self.client.batches.retrieve(job_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(self.client.files.content(file_id).text.splitlines())
+        return lines
+
+
+class LocalBatchTransport(BatchTransport):
+    def __init__(self, handler, directory=".mcq_batches"):
+        """
+        Stand-in for the batch API that answers requests with a local handler.
+
+        Jobs complete on submission and their output is written next to the
+        input in the batch API's format, so the rest of the pipeline is exercised
+        unchanged offline.
+
+        Args:
+            handler (callable): Takes a request body and returns the message content
+            directory (str): Directory for output files
+        """
+        self.handler = handler
+        self.directory = directory
+
+    def _output_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}-output.jsonl")
+
+    def submit(self, input_path):
+        job_id = os.path.splitext(os.path.basename(input_path))[0]
+        os.makedirs(self.directory, exist_ok=True)
+        with open(input_path, "r", encoding="utf-8") as source, \
+                open(self._output_path(job_id), "w", encoding="utf-8") as output:
+            for line in source:
+                request = json.loads(line)
+                try:
+                    content = self.handler(request["body"])
+                    result = {"response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": content}}]
+                    }}, "error": None}
+                except Exception as e:
+                    result = {"response": None, "error": {"message": str(e)}}
+                result["custom_id"] = request["custom_id"]
+                output.write(json.dumps(result) + "\n")
+        return job_id
+
+    def status(self, job_id):
+        return "completed" if os.path.exists(self._output_path(job_id)) else "failed"
+
+    def output_lines(self, job_id):
+        with open(self._output_path(job_id), "r", encoding="utf-8") as f:
+            return f.readlines()
+
+
+def wait_for_batch(transport, job_id, poll_interval=60, timeout=24 * 60 * 60, sleep=time.sleep):
+    """
+    Poll a batch job until it reaches a finished state.
+
+    Args:
+        transport (BatchTransport): Transport the job was submitted through
+        job_id (str): Job id returned by ``submit``
+        poll_interval (float): Seconds between status checks
+        timeout (float): Give up after this many seconds
+        sleep (callable): Sleep function, replaceable for tests
+
+    Returns:
+        str: The final state, or the last state seen if the timeout passed
+    """
+    waited = 0.0
+    while True:
+        state = transport.status(job_id)
+        if state in FINISHED_STATES or waited >= timeout:
+            return state
+        sleep(poll_interval)
+        waited += poll_interval
+
+
+class BatchRun:
+    def __init__(self, mdx_directory, num_questions=10, output_dir="questions", output_format="json",
+                 cache=None, manifest=None, state_path=".mcq_batches/job.json"):
+        """
+        Full regeneration of the question bank through one batch job.
+
+        ``submit`` plans requests for every stale page and submits them, and
+        ``collect`` fetches the results and writes the usual per-page outputs.
+        The job id is saved to ``state_path`` between the two, so collection can
+        happen in a later process once the batch has finished off-peak.
+
+        Args:
+            mdx_directory (str): Directory of MDX pages
+            num_questions (int): Questions per page
+            output_dir (str): Directory of question outputs
+            output_format (str): "json" or "jsonl"
+            cache (ResponseCache): Cache consulted while planning and filled while collecting
+            manifest (GenerationManifest): Manifest deciding which pages are stale
+            state_path (str): Where the submitted job id is kept
+        """
+        self.mdx_directory = mdx_directory
+        self.reader = LocalMDXReader(mdx_directory)
+        self.num_questions = num_questions
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.cache = cache or ResponseCache()
+        self.manifest = manifest or GenerationManifest()
+        self.state_path = state_path
+        self.metrics = None
+
+    def _output_path(self, mdx_path):
+        return question_output_path(mdx_path, self.output_dir, self.output_format, self.mdx_directory)
+
+    def stale_batches(self):
+        """Stale pages grouped exactly as an interactive run would pack them."""
+        documents = self.reader.iter_mdx_files(
+            path_filter=lambda path: self.manifest.is_stale(path, self._output_path(path))
+        )
+        return pack_documents(documents)
+
+    def plan(self):
+        """
+        Plan the requests for every stale page.
+
+        Returns:
+            dict: Batch request lines keyed by custom_id
+        """
+        planner = BatchPlanner(self.cache)
+        for batch in self.stale_batches():
+            planner.generate_batch(batch, num_questions=self.num_questions)
+        return planner.requests
+
+    def submit(self, transport):
+        """
+        Plan, write and submit the batch.
+
+        Returns:
+            str or None: Job id, or None when every page is already up to date or cached
+        """
+        requests = self.plan()
+        if not requests:
+            return None
+        input_path = write_batch_file(requests.values(), os.path.dirname(self.state_path) or ".")
+        job_id = transport.submit(input_path)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job_id, "input": input_path, "requests": len(requests)}, f)
+        print(f"Submitted {len(requests)} requests from {input_path} as batch {job_id}")
+        return job_id
+
+    def collect(self, transport, job_id=None):
+        """
+        Demultiplex a finished batch into per-page question outputs.
+
+        Pages with a failed or missing request are left stale for the next run.
+
+        Returns:
+            dict: Mapping of page path to its generated questions
+        """
+        if job_id is None:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                job_id = json.load(f)["job_id"]
+        contents, errors = parse_batch_output(transport.output_lines(job_id))
+        print(f"Batch {job_id}: {len(contents)} responses, {len(errors)} failed requests")
+
+        replay = BatchReplay(contents, self.cache)
+        self.metrics = replay.metrics
+        results = {}
+        for batch in self.stale_batches():
+            page_questions = replay.generate_batch(batch, num_questions=self.num_questions)
+            for file_data, questions in zip(batch, page_questions):
+                results[file_data.path] = questions
+                if questions:
+                    output_path = self._output_path(file_data.path)
+                    if replay.save_to_file(questions, output_path):
+                        self.manifest.record(file_data.path, output_path)
+        self.manifest.save()
+        return results
+
+
+def main(action="run", mdx_directory="../pages", poll_interval=60):
+    """
+    Regenerate the question bank through the OpenAI Batch API.
+
+    ``submit`` and ``collect`` can run in separate processes; ``run`` does both,
+    polling until the batch finishes.
+    """
+    run = BatchRun(mdx_directory)
+    transport = OpenAIBatchTransport()
+    if action in ("submit", "run"):
+        job_id = run.submit(transport)
+        if job_id is None:
+            print("Nothing to generate.")
+            return
+        if action == "submit":
+            return
+        state = wait_for_batch(transport, job_id, poll_interval=float(poll_interval))
+        print(f"Batch {job_id} finished as {state}")
+        # Expired and cancelled jobs still return the requests that finished
+        if state not in FINISHED_STATES or state == "failed":
+            return
+    results = run.collect(transport)
+    print(f"Generated MCQs for {sum(1 for questions in results.values() if questions)} of {len(results)} files")
+    print(f"Response cache: {run.cache.stats()}")
+    print(f"Response extraction: {run.metrics.stats()}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
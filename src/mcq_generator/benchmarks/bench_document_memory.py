@@ -0,0 +1,76 @@
+"""
+Compare memory held by MdxDocument objects against the old per-file dict layout.
+
+A synthetic corpus is generated in memory (no files are written) and parsed both
+ways; tracemalloc reports the bytes retained by each representation.
+
+    python benchmarks/bench_document_memory.py --pages 100000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdx_reader import LocalMDXReader, MdxDocument
+
+
+def make_page(index, rng):
+    paragraphs = "\n\n".join(
+        " ".join(rng.choice(("angular", "component", "query", "index", "state", "render", "hook"))
+                 for _ in range(rng.randint(20, 80)))
+        for _ in range(rng.randint(3, 12))
+    )
+    return f"---\nlayout: ../../layouts/QuestionLayout.astro\ntitle: Page {index}\n---\n\n# Page {index}\n\n{paragraphs}\n"
+
+
+def measure(build, pages):
+    gc.collect()
+    tracemalloc.start()
+    documents = [build(f"pages/topic/page-{i}.mdx", text) for i, text in enumerate(pages)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del documents
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [make_page(i, rng) for i in range(args.pages)]
+    reader = LocalMDXReader()
+
+    def build_dict(path, text):
+        metadata, body = reader.parse_frontmatter(text)
+        return {
+            'path': path,
+            'filename': os.path.basename(path),
+            'metadata': metadata,
+            'content': body,
+            'raw_content': text
+        }
+
+    def build_document(path, text):
+        metadata, body_start, body_end = reader.split_frontmatter(text)
+        return MdxDocument(path, text, metadata, body_start, body_end)
+
+    # The raw text is shared by both layouts and allocated before tracing starts,
+    # so the figures are the per-document overhead on top of the file contents.
+    corpus_bytes = sum(sys.getsizeof(text) for text in pages)
+    dict_bytes = measure(build_dict, pages)
+    document_bytes = measure(build_document, pages)
+
+    print(f"{args.pages} pages, raw text {corpus_bytes / 2**20:.1f} MiB")
+    print(f"dict layout     {dict_bytes / 2**20:8.1f} MiB")
+    print(f"MdxDocument     {document_bytes / 2**20:8.1f} MiB")
+    print(f"saving          {(1 - document_bytes / dict_bytes) * 100:8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare a frontmatter-only scan against full reads of large MDX pages.
+
+Writes a temporary corpus of large pages, then times read_mdx_file against
+read_frontmatter over every file.
+
+    python benchmarks/bench_frontmatter_scan.py --pages 2000 --page-kib 256
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdx_reader import LocalMDXReader
+
+
+def write_corpus(directory, pages, page_kib):
+    body = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n" * 18) * page_kib
+    for i in range(pages):
+        with open(os.path.join(directory, f"page-{i}.mdx"), "w", encoding="utf-8") as f:
+            f.write(f"---\nlayout: ../../layouts/QuestionLayout.astro\ntitle: Page {i}\n---\n\n{body}")
+
+
+def timed(label, func, paths):
+    start = time.perf_counter()
+    for path in paths:
+        func(path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:20s} {elapsed:8.3f}s  {len(paths) / elapsed:10.0f} files/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--page-kib", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, args.pages, args.page_kib)
+        reader = LocalMDXReader(directory)
+        paths = reader.get_mdx_files()
+
+        full = timed("full read", reader.read_mdx_file, paths)
+        scan = timed("frontmatter only", reader.read_frontmatter, paths)
+        print(f"speedup {full / scan:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure link-extraction throughput on a synthetic in-memory corpus.
+
+Compares the previous two-pass ``re.findall`` extractor, which built a dict per
+link, with the ``LocalMDXReader.iter_links`` stream. ``--tree`` measures the
+real pages instead, repeated ``--repeat`` times.
+
+    python benchmarks/bench_link_extraction.py --pages 50000
+    python benchmarks/bench_link_extraction.py --tree ../pages --repeat 40
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdx_reader import LocalMDXReader, MdxDocument
+
+
+def make_corpus(pages, seed=0):
+    rng = random.Random(seed)
+    fragments = (
+        "Angular components render templates.",
+        "See [the guide](/questions/angular-architecture) for details.",
+        '<a href="https://angular.io/docs">Angular docs</a>',
+        "![diagram](/images/angular/di-flow.svg)",
+        "```ts\nconst routes = [{ path: '' }](fake);\n```",
+        "Indexes speed up lookups on large tables.",
+    )
+    documents = []
+    for i in range(pages):
+        body = "\n\n".join(rng.choice(fragments) for _ in range(rng.randint(10, 60)))
+        documents.append(MdxDocument(f"pages/topic/page-{i}.mdx", body, {}))
+    return documents
+
+
+def two_pass(documents):
+    count = 0
+    for document in documents:
+        content = document.content
+        markdown_links = re.findall(r'\[([^\]]+)\]\(([^)]+)\)', content)
+        html_links = re.findall(r'<a\s+[^>]*href=["\'](.*?)["\'][^>]*>(.*?)<\/a>', content)
+        all_links = [
+            {'text': text, 'url': url} for text, url in markdown_links
+        ] + [
+            {'text': text, 'url': url} for url, text in html_links
+        ]
+        count += len(all_links)
+    return count
+
+
+def stream(documents):
+    return sum(1 for _ in LocalMDXReader().iter_links(documents))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50000)
+    parser.add_argument("--tree")
+    parser.add_argument("--repeat", type=int, default=40)
+    args = parser.parse_args()
+
+    if args.tree:
+        documents = [document for document in LocalMDXReader(args.tree).iter_mdx_files()
+                     if document.content] * args.repeat
+    else:
+        documents = make_corpus(args.pages)
+    total_mib = sum(len(document.raw_content) for document in documents) / 2**20
+
+    for label, func in (("two-pass findall", two_pass), ("iter_links stream", stream)):
+        start = time.perf_counter()
+        links = func(documents)
+        elapsed = time.perf_counter() - start
+        print(f"{label:20s} {elapsed:7.2f}s  {total_mib / elapsed:7.1f} MiB/s  {links} links")
+
+    print("(two-pass also counts links inside fenced code blocks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark serial against parallel topic upload to a local mongod.
+
+Generates question files for 1k topics, then uploads them with one worker and
+with a thread pool over a shared pooled client. Uses a throwaway database.
+
+    python benchmarks/bench_mongo_upload.py --uri mongodb://localhost:27017 --workers 8 --compressors zlib
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongo_db_connect import create_client, get_json_files, bulk_upsert, ensure_indexes
+
+
+def write_topics(directory, topics, questions_per_topic, seed=0):
+    """Write ``topics`` reproducible question files; shared with the other upload benchmarks."""
+    rng = random.Random(seed)
+    for i in range(topics):
+        questions = [
+            {
+                "question": f"Topic {i} question {j}: " + " ".join(rng.choice("abcdefgh") * 5 for _ in range(12)),
+                "options": {letter: f"Option {letter} " + "x" * rng.randint(10, 60) for letter in "ABCD"},
+                "correct_answer": rng.choice("ABCD"),
+            }
+            for j in range(questions_per_topic)
+        ]
+        with open(os.path.join(directory, f"topic-{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(questions, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default=os.environ.get("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--compressors", default=None, help="e.g. zlib, zstd or snappy")
+    parser.add_argument("--write-concern", default=None, help='e.g. 1 or "majority"')
+    args = parser.parse_args()
+
+    write_concern = int(args.write_concern) if args.write_concern and args.write_concern.isdigit() else args.write_concern
+    client = create_client(args.uri, max_pool_size=args.workers + 4,
+                           compressors=args.compressors, write_concern=write_concern)
+    collection = client["mcq_benchmark"]["Mcqs"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_topics(directory, args.topics, args.questions)
+        json_files = get_json_files(directory)
+
+        for label, workers in (("serial", 1), (f"parallel x{args.workers}", args.workers)):
+            collection.drop()
+            ensure_indexes(collection)
+            start = time.perf_counter()
+            counts = bulk_upsert(collection, json_files, batch_size=args.batch_size,
+                                 skip_unchanged=False, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:14s} {elapsed:7.2f}s  {len(json_files) / elapsed:8.0f} topics/s  {counts}")
+
+    client.drop_database("mcq_benchmark")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark serial against process-pool parsing of a generated MDX corpus.
+
+    python benchmarks/bench_parallel_parse.py --pages 50000 --workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdx_reader import LocalMDXReader
+
+
+def write_corpus(directory, pages, seed=0):
+    rng = random.Random(seed)
+    words = ("angular", "component", "query", "index", "state", "render", "hook", "[docs](/questions/x)")
+    for i in range(pages):
+        topic_dir = os.path.join(directory, f"topic-{i % 50}")
+        os.makedirs(topic_dir, exist_ok=True)
+        body = "\n\n".join(" ".join(rng.choice(words) for _ in range(60)) for _ in range(rng.randint(3, 15)))
+        with open(os.path.join(topic_dir, f"page-{i}.mdx"), "w", encoding="utf-8") as f:
+            f.write(f"---\nlayout: ../../layouts/QuestionLayout.astro\ntitle: Page {i}\n---\n\n# Page {i}\n\n{body}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, args.pages)
+        reader = LocalMDXReader(directory)
+        paths = reader.get_mdx_files()
+
+        start = time.perf_counter()
+        serial = [reader.read_mdx_file(path) for path in paths]
+        serial_links = reader.extract_links(serial)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel, parallel_links = reader.parse_files_parallel(
+            paths, workers=args.workers, chunk_size=args.chunk_size, with_links=True
+        )
+        parallel_time = time.perf_counter() - start
+
+        assert [doc.path for doc in serial] == [doc.path for doc in parallel]
+        assert list(serial_links) == list(parallel_links)
+
+        print(f"{len(paths)} files")
+        print(f"serial    {serial_time:8.2f}s")
+        print(f"parallel  {parallel_time:8.2f}s  ({serial_time / parallel_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
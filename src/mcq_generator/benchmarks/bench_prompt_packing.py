@@ -0,0 +1,61 @@
+"""
+Count the requests and prompt tokens a full generation run would send.
+
+Builds every prompt for the pages tree without calling the API, once with one
+request per page (sections included) and once with small pages packed together.
+
+    python benchmarks/bench_prompt_packing.py --pages ../pages --max-packed 4
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mdx_reader import LocalMDXReader, MCQGenerator
+from mdx_chunker import pack_documents
+from rate_limiter import estimate_tokens
+
+
+class PromptCounter(MCQGenerator):
+    """Generator whose requests are only counted, never sent."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.requests = 0
+        self.prompt_tokens = 0
+
+    def create_client(self, api_key):
+        return None
+
+    def count(self, prompt):
+        self.requests += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+
+    def generate_mcqs(self, text, num_questions=5, bypass_cache=False):
+        self.count(self.build_prompt(text, num_questions))
+        return [{}] * num_questions
+
+    def generate_packed_mcqs(self, texts, num_questions=5, bypass_cache=False):
+        self.count(self.build_packed_prompt({f"doc-{i + 1}": text for i, text in enumerate(texts)}, num_questions))
+        return [[{}] * num_questions for _ in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", default="../pages")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--max-packed", type=int, default=4)
+    args = parser.parse_args()
+
+    documents = list(LocalMDXReader(args.pages).iter_mdx_files())
+    print(f"{len(documents)} pages")
+    for label, max_documents in (("one per page", 1), (f"packed x{args.max_packed}", args.max_packed)):
+        counter = PromptCounter()
+        for batch in pack_documents(documents, max_documents=max_documents):
+            counter.generate_batch(batch, num_questions=args.questions)
+        print(f"{label:14s} {counter.requests:6d} requests  {counter.prompt_tokens:9d} prompt tokens")
+
+
+if __name__ == "__main__":
+    main()
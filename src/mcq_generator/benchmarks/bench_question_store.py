@@ -0,0 +1,60 @@
+"""
+Benchmark the question-store operations against the configured backend.
+
+Generates question files for 1k topics, then times a cold bulk load, a no-op
+reload, fetch-by-key and sampling. Defaults to a throwaway SQLite file so it
+runs offline; pass --backend mongo (with MONGO_URI) to compare against a mongod.
+
+    python benchmarks/bench_question_store.py --backend sqlite --topics 1000 --questions 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongo_db_connect import get_json_files
+from question_store import BACKENDS, open_question_store
+from bench_mongo_upload import write_topics
+
+
+def timed(label, operation, count, unit):
+    start = time.perf_counter()
+    result = operation()
+    elapsed = time.perf_counter() - start
+    print(f"{label:16s} {elapsed:7.3f}s  {count / elapsed:10.0f} {unit}/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite")
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_topics(directory, args.topics, args.questions)
+        json_files = get_json_files(directory)
+        total = args.topics * args.questions
+        options = {"path": os.path.join(directory, "questions.db")} if args.backend == "sqlite" else {
+            "database": "mcq_benchmark"
+        }
+
+        with open_question_store(args.backend, **options) as store:
+            keys = [f"topic-{random.randrange(args.topics)}" for _ in range(args.lookups)]
+            print(timed("cold load", lambda: store.bulk_load(json_files, args.batch_size), total, "questions"))
+            print(timed("no-op reload", lambda: store.bulk_load(json_files, args.batch_size), total, "questions"))
+            timed("fetch by key", lambda: [store.fetch(key) for key in keys], args.lookups, "topics")
+            timed("sample 10", lambda: [store.sample(key, 10) for key in keys], args.lookups, "quizzes")
+            if args.backend == "mongo":
+                store.client.drop_database("mcq_benchmark")
+
+
+if __name__ == "__main__":
+    main()
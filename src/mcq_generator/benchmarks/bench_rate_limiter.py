@@ -0,0 +1,93 @@
+"""
+Benchmark the token-bucket RateLimiter against the old fixed sleep-every-20-files loop.
+
+Everything runs on a SimulatedClock, so no API key is needed and the reported
+times are simulated wall-clock seconds for a full regeneration run.
+
+    python benchmarks/bench_rate_limiter.py --pages 235 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter, SimulatedClock
+
+
+def make_workload(pages, seed=0):
+    """Return (estimated_tokens, actual_tokens, latency_seconds) per simulated request."""
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(pages):
+        prompt_tokens = int(rng.lognormvariate(7.0, 0.6))
+        estimated = prompt_tokens + 1200
+        actual = prompt_tokens + rng.randint(600, 1400)
+        latency = 4.0 + actual / 100.0
+        workload.append((estimated, actual, latency))
+    return workload
+
+
+def run_fixed_sleep(workload):
+    """Old behaviour: serial requests with a 60 second pause after every 20 files."""
+    clock = SimulatedClock()
+    for index, (_, _, latency) in enumerate(workload):
+        if index % 20 == 0 and index != 0:
+            clock.sleep(60)
+        clock.sleep(latency)
+    return clock.time()
+
+
+def run_sync(workload, rpm, tpm):
+    clock = SimulatedClock()
+    limiter = RateLimiter(rpm, tpm, clock=clock.time, sleep=clock.sleep)
+    for estimated, actual, latency in workload:
+        limiter.acquire(estimated)
+        clock.sleep(latency)
+        limiter.record_usage(estimated, actual)
+    return clock.time()
+
+
+def run_async(workload, rpm, tpm, concurrency):
+    clock = SimulatedClock()
+    limiter = RateLimiter(rpm, tpm, clock=clock.time, sleep=clock.sleep, sleep_async=clock.sleep_async)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(estimated, actual, latency):
+        async with semaphore:
+            await limiter.acquire_async(estimated)
+            await clock.sleep_async(latency)
+            limiter.record_usage(estimated, actual)
+
+    async def run_all():
+        await asyncio.gather(*(request(*item) for item in workload))
+
+    asyncio.run(run_all())
+    return clock.time()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=235)
+    parser.add_argument("--rpm", type=int, default=500)
+    parser.add_argument("--tpm", type=int, default=40000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    workload = make_workload(args.pages)
+    total_tokens = sum(actual for _, actual, _ in workload)
+    print(f"{args.pages} requests, {total_tokens} tokens, limits {args.rpm} RPM / {args.tpm} TPM")
+    print(f"Token-limited lower bound: {total_tokens / args.tpm * 60:.0f}s")
+
+    for name, elapsed in [
+        ("fixed sleep (serial)", run_fixed_sleep(workload)),
+        ("token bucket (serial)", run_sync(workload, args.rpm, args.tpm)),
+        (f"token bucket (async x{args.concurrency})", run_async(workload, args.rpm, args.tpm, args.concurrency)),
+    ]:
+        print(f"{name:32s} {elapsed:8.0f}s simulated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+import posixpath
+from collections import Counter, defaultdict
+from mdx_reader import LocalMDXReader
+
+
+# Source extensions Astro turns into routes
+PAGE_EXTENSIONS = (".mdx", ".md", ".astro")
+
+
+def route_for_path(relative_path):
+    """
+    Derive the URL route Astro serves for a file under src/pages.
+
+    Args:
+        relative_path (str): Path relative to the pages directory, e.g. "angular/basic/intro.mdx"
+
+    Returns:
+        str: Route such as "/angular/basic/intro"; index files map to their directory
+    """
+    route = os.path.splitext(relative_path)[0].replace(os.sep, "/")
+    if route == "index":
+        return "/"
+    if route.endswith("/index"):
+        route = route[:-len("/index")]
+    return "/" + route
+
+
+def normalize_url(url, source_route):
+    """
+    Reduce an internal link to the route it points at.
+
+    Args:
+        url (str): Link target as written in the page
+        source_route (str): Route of the page containing the link
+
+    Returns:
+        str or None: Normalized route, or None for external, anchor-only or non-HTTP links
+    """
+    url = url.strip().split()[0] if url.strip() else ""
+    if not url or url.startswith(("#", "//")) or ":" in url.split("/", 1)[0]:
+        return None
+
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if not url:
+        return None
+
+    if not url.startswith("/"):
+        # build.format is 'directory', so pages are served as /route/ and relative
+        # links resolve against the page's own route
+        url = posixpath.join(source_route, url)
+
+    route = posixpath.normpath(url)
+    return "/" if route in ("/", ".") else route.rstrip("/")
+
+
+class RouteIndex:
+    def __init__(self, pages_directory, public_directory=None):
+        """
+        Hash index of every route in the site, built from the file tree alone.
+
+        Static routes and public assets live in a set for O(1) lookups. Dynamic
+        routes such as ``[topic]/quiz.astro`` are kept as segment patterns grouped
+        by depth and only consulted on a static miss.
+
+        Args:
+            pages_directory (str): Path to src/pages
+            public_directory (str): Path to public/, whose files are served as-is
+        """
+        self.pages_directory = pages_directory
+        self.public_directory = public_directory
+        self.pages = {}
+        self.assets = set()
+        self.dynamic_routes = defaultdict(list)
+        self._scan_pages(pages_directory)
+        if public_directory:
+            self._scan_public(public_directory)
+
+    def _scan_pages(self, directory):
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    self._scan_pages(entry.path)
+                elif entry.name.endswith(PAGE_EXTENSIONS):
+                    relative = os.path.relpath(entry.path, self.pages_directory)
+                    route = route_for_path(relative)
+                    if "[" in route:
+                        segments = route.strip("/").split("/")
+                        self.dynamic_routes[len(segments)].append((route, segments))
+                    else:
+                        self.pages[route] = entry.path
+
+    def _scan_public(self, directory):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                relative = os.path.relpath(os.path.join(root, name), self.public_directory)
+                self.assets.add("/" + relative.replace(os.sep, "/"))
+
+    def resolve(self, route):
+        """
+        Find what a normalized route points at.
+
+        Returns:
+            str or None: The matching page route, asset path or dynamic route pattern
+        """
+        if route in self.pages or route in self.assets:
+            return route
+
+        segments = route.strip("/").split("/")
+        for pattern, pattern_segments in self.dynamic_routes.get(len(segments), ()):
+            if all(p.startswith("[") or p == s for p, s in zip(pattern_segments, segments)):
+                return pattern
+        return None
+
+    def __len__(self):
+        return len(self.pages)
+
+
+def check_links(pages_directory, public_directory=None):
+    """
+    Validate every internal link in the MDX pages against the route index.
+
+    Args:
+        pages_directory (str): Path to src/pages
+        public_directory (str): Path to public/
+
+    Returns:
+        dict: Report with broken links, orphan pages and per-topic in-degree stats
+    """
+    index = RouteIndex(pages_directory, public_directory)
+    reader = LocalMDXReader(pages_directory)
+    in_degree = Counter()
+    broken = []
+    checked = 0
+
+    for link in reader.iter_links(reader.iter_mdx_files()):
+        source_route = route_for_path(os.path.relpath(link.file, pages_directory))
+        route = normalize_url(link.url, source_route)
+        if route is None:
+            continue
+
+        checked += 1
+        target = index.resolve(route)
+        if target is None:
+            broken.append({"file": link.file, "url": link.url, "text": link.text})
+        elif target in index.pages and target != source_route:
+            in_degree[target] += 1
+
+    # Pages no MDX page links to; navigation in layouts and the sidebar is not counted
+    orphans = sorted(route for route in index.pages if in_degree[route] == 0 and route != "/")
+
+    topics = defaultdict(lambda: {"pages": 0, "inbound_links": 0, "max_in_degree": 0, "orphans": 0})
+    for route in index.pages:
+        topic = route.strip("/").split("/")[0] or "/"
+        stats = topics[topic]
+        stats["pages"] += 1
+        stats["inbound_links"] += in_degree[route]
+        stats["max_in_degree"] = max(stats["max_in_degree"], in_degree[route])
+        stats["orphans"] += in_degree[route] == 0
+
+    return {
+        "routes": len(index),
+        "links_checked": checked,
+        "broken": broken,
+        "orphans": orphans,
+        "topics": dict(sorted(topics.items())),
+    }
+
+
+def main(pages_directory="../pages", public_directory="../../public"):
+    """Check internal links and print a report; exits non-zero if any are broken."""
+    start = time.perf_counter()
+    report = check_links(pages_directory, public_directory)
+    elapsed = time.perf_counter() - start
+
+    print(f"Indexed {report['routes']} routes, checked {report['links_checked']} internal links in {elapsed:.3f}s")
+
+    print(f"\n==== Broken links ({len(report['broken'])}) ====")
+    for link in report["broken"]:
+        print(f"{link['file']}: [{link['text']}]({link['url']})")
+
+    print(f"\n==== Orphan pages ({len(report['orphans'])}) ====")
+    for route in report["orphans"]:
+        print(route)
+
+    print("\n==== In-degree by topic ====")
+    for topic, stats in report["topics"].items():
+        print(f"{topic:20s} pages={stats['pages']:4d} inbound={stats['inbound_links']:5d} "
+              f"max={stats['max_in_degree']:4d} orphans={stats['orphans']:4d}")
+
+    return 1 if report["broken"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
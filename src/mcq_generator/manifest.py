@@ -0,0 +1,145 @@
+import os
+import json
+import hashlib
+from question_bank import QuestionBank
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 of a file's contents.
+
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Bytes read per iteration
+
+    Returns:
+        str or None: Hex digest, or None if the file does not exist
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def remove_output(output_path):
+    """
+    Delete a generated question file, along with the offset index of a .jsonl question bank.
+
+    Returns:
+        bool: True if the file existed
+    """
+    return QuestionBank(output_path).remove()
+
+
+class GenerationManifest:
+    def __init__(self, manifest_path="questions/.manifest.json"):
+        """
+        Record of which MDX pages have already been turned into question files.
+
+        Each entry stores the page's content hash, mtime and size plus the path
+        and hash of its generated output, so a run only regenerates pages that
+        were edited, added, or whose output went missing or was changed.
+
+        Args:
+            manifest_path (str): Path of the JSON manifest file
+        """
+        self.manifest_path = manifest_path
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest from disk; a missing or corrupt manifest starts empty."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the manifest atomically."""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_stale(self, mdx_path, output_path):
+        """
+        Decide whether a page needs its questions regenerated.
+
+        The cheap mtime/size check short-circuits hashing for untouched files;
+        a touched-but-identical file is re-hashed and treated as unchanged.
+
+        Args:
+            mdx_path (str): Path to the MDX page
+            output_path (str): Path of the question file generated from it
+
+        Returns:
+            bool: True if the page is new, edited, or its output is missing or modified
+        """
+        entry = self.entries.get(mdx_path)
+        if entry is None or entry.get("output") != output_path:
+            return True
+
+        try:
+            stat = os.stat(mdx_path)
+        except OSError:
+            return True
+
+        if (stat.st_mtime, stat.st_size) != (entry["mtime"], entry["size"]):
+            if hash_file(mdx_path) != entry["sha256"]:
+                return True
+            entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+
+        output_sha256 = hash_file(output_path)
+        return output_sha256 is None or output_sha256 != entry["output_sha256"]
+
+    def record(self, mdx_path, output_path):
+        """
+        Record that ``output_path`` was generated from the current state of ``mdx_path``.
+
+        Args:
+            mdx_path (str): Path to the MDX page
+            output_path (str): Path of the question file generated from it
+        """
+        stat = os.stat(mdx_path)
+        previous = self.entries.get(mdx_path, {}).get("output")
+        self.entries[mdx_path] = {
+            "sha256": hash_file(mdx_path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "output": output_path,
+            "output_sha256": hash_file(output_path),
+        }
+        # e.g. the output format changed; the old file would otherwise load as a duplicate topic
+        if previous and previous != output_path and not self._is_claimed(previous):
+            remove_output(previous)
+
+    def _is_claimed(self, output_path):
+        """Whether any page's entry still points at ``output_path``."""
+        return any(entry["output"] == output_path for entry in self.entries.values())
+
+    def prune(self, existing_paths):
+        """
+        Drop entries for pages that no longer exist and delete their outputs.
+
+        Args:
+            existing_paths (iterable): Paths of all MDX pages in the current tree
+
+        Returns:
+            list: Paths of the question files that were removed
+        """
+        existing = set(existing_paths)
+        removed = []
+        for mdx_path in [path for path in self.entries if path not in existing]:
+            output_path = self.entries.pop(mdx_path)["output"]
+            # Never delete a file another page still owns
+            if not self._is_claimed(output_path) and remove_output(output_path):
+                removed.append(output_path)
+        return removed
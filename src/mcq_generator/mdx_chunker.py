@@ -0,0 +1,247 @@
+import re
+from collections import namedtuple
+from rate_limiter import estimate_tokens
+
+
+# Context window of the generation model (gpt-4)
+MODEL_CONTEXT_TOKENS = 8192
+
+# Completion tokens budgeted per question when reserving rate-limit capacity
+COMPLETION_TOKENS_PER_QUESTION = 120
+
+# Instructions plus the earlier questions a remainder request repeats back
+PROMPT_RESERVE_TOKENS = 500
+
+# Default prompt budget for one section's text: what the context leaves after the
+# instructions and a full page's ten questions, less a quarter because token counts
+# are estimated from characters. Only genuinely long pages are split.
+MAX_SECTION_TOKENS = int((MODEL_CONTEXT_TOKENS - PROMPT_RESERVE_TOKENS - 10 * COMPLETION_TOKENS_PER_QUESTION) * 0.75)
+
+# Completion reserved in a packed request for each page's ten questions
+PAGE_COMPLETION_TOKENS = 10 * COMPLETION_TOKENS_PER_QUESTION
+
+# Budget for one packed request's page text plus the completions reserved for its pages
+PACKED_REQUEST_TOKENS = int((MODEL_CONTEXT_TOKENS - PROMPT_RESERVE_TOKENS) * 0.75)
+
+# Pages that are not split are candidates for packing; how many share a request is
+# decided by PACKED_REQUEST_TOKENS
+SMALL_PAGE_TOKENS = MAX_SECTION_TOKENS
+
+# Most pages answered by one packed request; keeps the completion well inside the context window
+MAX_PACKED_DOCUMENTS = 4
+
+HEADING_PATTERN = re.compile(r'#{1,2}\s')
+FENCE_PATTERN = re.compile(r'[ ]{0,3}(`{3,}|~{3,})')
+
+Section = namedtuple("Section", ["heading", "text", "tokens"])
+
+
+def _blocks(body):
+    """
+    Split an MDX body into blocks that are never cut in half.
+
+    A block is a run of prose lines between blank lines, or a whole fenced code
+    block. Each block is tagged with whether it opens a ``#``/``##`` section.
+
+    Yields:
+        tuple: (starts_section, heading or None, block text)
+    """
+    lines = []
+    fence = None
+    starts_section = False
+    heading = None
+
+    def flush():
+        text = "".join(lines)
+        lines.clear()
+        return starts_section, heading, text
+
+    for line in body.splitlines(keepends=True):
+        if fence:
+            lines.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                yield flush()
+                starts_section, heading = False, None
+            continue
+
+        match = FENCE_PATTERN.match(line)
+        if match:
+            if lines:
+                yield flush()
+                starts_section, heading = False, None
+            fence = match.group(1)
+            lines.append(line)
+        elif HEADING_PATTERN.match(line):
+            if lines:
+                yield flush()
+            starts_section, heading = True, line.strip().lstrip("#").strip()
+            lines.append(line)
+        elif not line.strip():
+            if lines:
+                lines.append(line)
+                yield flush()
+                starts_section, heading = False, None
+        else:
+            lines.append(line)
+
+    if lines:
+        yield flush()
+
+
+def _split_oversized(text, max_tokens):
+    """
+    Hard-split a single block larger than the budget on line boundaries.
+
+    Pieces of a fenced code block are each re-wrapped in the block's fence so
+    every piece still reads as code.
+    """
+    lines = text.splitlines(keepends=True)
+    opener = closer = ""
+    match = FENCE_PATTERN.match(lines[0])
+    if match:
+        opener = lines.pop(0)
+        if lines and lines[-1].strip().startswith(match.group(1)):
+            closer = lines.pop()
+        closer = closer or match.group(1) + "\n"
+
+    pieces, piece = [], []
+    for line in lines:
+        if piece and estimate_tokens(opener + "".join(piece) + line + closer) > max_tokens:
+            pieces.append(opener + "".join(piece) + closer)
+            piece.clear()
+        piece.append(line)
+    if piece:
+        pieces.append(opener + "".join(piece) + closer)
+    return pieces
+
+
+def split_sections(body, max_tokens=MAX_SECTION_TOKENS):
+    """
+    Split an MDX body into token-budgeted sections.
+
+    Sections start at ``#`` and ``##`` headings outside code fences. A section
+    over ``max_tokens`` is split between paragraphs or fenced code blocks, and
+    only a single block that is itself over budget is cut mid-block. Adjacent
+    sections are then packed together up to the budget, so short headings do
+    not each cost a request.
+
+    Args:
+        body (str): MDX body without frontmatter
+        max_tokens (int): Token budget per section
+
+    Returns:
+        list: Section tuples in document order
+    """
+    sections = []
+    heading, parts, tokens = None, [], 0
+
+    def close():
+        text = "".join(parts).strip()
+        if text:
+            sections.append(Section(heading, text, estimate_tokens(text)))
+        parts.clear()
+
+    for starts_section, block_heading, text in _blocks(body):
+        block_tokens = estimate_tokens(text)
+        if starts_section or (parts and tokens + block_tokens > max_tokens):
+            close()
+            heading = block_heading if starts_section else heading
+            tokens = 0
+        if block_tokens > max_tokens:
+            for piece in _split_oversized(text, max_tokens):
+                parts.append(piece)
+                close()
+            tokens = 0
+            continue
+        parts.append(text)
+        tokens += block_tokens
+    close()
+
+    merged = []
+    for section in sections:
+        previous = merged[-1] if merged else None
+        if previous and previous.tokens + section.tokens <= max_tokens:
+            text = f"{previous.text}\n\n{section.text}"
+            merged[-1] = Section(previous.heading or section.heading, text, estimate_tokens(text))
+        else:
+            merged.append(section)
+    return merged
+
+
+def allocate_questions(sections, num_questions):
+    """
+    Share a page's question budget between its sections in proportion to their size.
+
+    Uses largest remainders so the counts always sum to ``num_questions``; when
+    there are more sections than questions the smallest sections get none.
+
+    Args:
+        sections (list): Section tuples
+        num_questions (int): Questions wanted for the whole page
+
+    Returns:
+        list: Question count per section, aligned with ``sections``
+    """
+    total = sum(section.tokens for section in sections)
+    if not total:
+        return [0] * len(sections)
+    shares = [num_questions * section.tokens / total for section in sections]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(sections)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:num_questions - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def pack_documents(documents, max_tokens=PACKED_REQUEST_TOKENS, small_page_tokens=SMALL_PAGE_TOKENS,
+                   max_documents=MAX_PACKED_DOCUMENTS, open_bins=8, completion_tokens=PAGE_COMPLETION_TOKENS):
+    """
+    Group small pages so several can share one request.
+
+    Each page costs its body tokens plus ``completion_tokens`` for its answer.
+    Pages over ``small_page_tokens``, or too large to share ``max_tokens`` with
+    any other page, are yielded on their own. The rest are placed first-fit into
+    a handful of open bins of at most ``max_tokens`` and ``max_documents`` pages;
+    a bin is yielded once it holds ``max_documents`` pages, or when too many are
+    open, the fullest is yielded to make room. Input is consumed lazily, so this
+    can sit between a document stream and the generator.
+
+    Args:
+        documents (iterable): MdxDocument-like objects with ``content``; empty pages are skipped
+        max_tokens (int): Budget for one packed request's bodies and completions
+        small_page_tokens (int): Largest page body that is packed with others
+        max_documents (int): Most pages per packed request
+        open_bins (int): Partially filled bins kept open at once
+        completion_tokens (int): Completion reserved per page
+
+    Yields:
+        list: Pages to generate in one request
+    """
+    bins = []
+    for document in documents:
+        if not document.content:
+            continue
+        body_tokens = estimate_tokens(document.content)
+        tokens = body_tokens + completion_tokens
+        if body_tokens > small_page_tokens or tokens + completion_tokens > max_tokens:
+            yield [document]
+            continue
+
+        target = next((b for b in bins if b[0] + tokens <= max_tokens and len(b[1]) < max_documents), None)
+        if target is None:
+            target = [0, []]
+            bins.append(target)
+        target[0] += tokens
+        target[1].append(document)
+
+        if len(target[1]) >= max_documents:
+            bins.remove(target)
+            yield target[1]
+        elif len(bins) > open_bins:
+            fullest = max(bins, key=lambda b: b[0])
+            bins.remove(fullest)
+            yield fullest[1]
+
+    for _, batch in bins:
+        yield batch
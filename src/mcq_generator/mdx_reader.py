@@ -1,13 +1,99 @@
 import os
-import glob
 import re
 import json
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, AsyncIterator
+from openai import OpenAI, AsyncOpenAI
 from pathlib import Path
 from tqdm import tqdm
 from dotenv import load_dotenv
-import time
+from rate_limiter import RateLimiter, estimate_tokens
+from response_cache import ResponseCache
+from response_parser import IncrementalArrayParser, Extraction, ExtractionMetrics, extract_questions, extract_object, is_valid_question
+from manifest import GenerationManifest
+from question_bank import QuestionBank
+from mdx_chunker import (COMPLETION_TOKENS_PER_QUESTION, MAX_SECTION_TOKENS, MAX_PACKED_DOCUMENTS, FENCE_PATTERN,
+                         split_sections, allocate_questions, pack_documents)
+
+
+# Fenced code blocks, whose links are ignored. The opening fence follows the chunker's
+# FENCE_PATTERN and a block closes at the first line that starts with the same fence, so
+# ```` blocks may contain ``` lines. Bodies are scanned with a leading newline and matched a
+# line at a time; an unclosed fence runs to the end of the text.
+FENCED_BLOCK_PATTERN = re.compile(
+    r'\n' + FENCE_PATTERN.pattern + r'[^\n]*(?:\n(?:[^\n]*\n)*?[^\S\n]*\1[^\n]*|[\s\S]*)'
+)
+
+# Markdown links (images included) and HTML anchors. Each starts with a literal, so a search
+# runs at memchr speed and rules out the many pages without links before any fence is found.
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+HTML_LINK_PATTERN = re.compile(r'<a\s+[^>]*href=["\'](.*?)["\'][^>]*>(.*?)<\/a>')
+
+# Markdown images/links and HTML anchors, found in one pass over the text between fences
+LINK_PATTERN = re.compile(
+    r'!\[(?P<image_text>[^\]]+)\]\((?P<image_url>[^)]+)\)'
+    r'|\[(?P<markdown_text>[^\]]+)\]\((?P<markdown_url>[^)]+)\)'
+    r'|<a\s+[^>]*href=["\'](?P<html_url>.*?)["\'][^>]*>(?P<html_text>.*?)<\/a>'
+)
+
+# A link found in an MDX file; kind is 'markdown', 'image' or 'html'
+Link = namedtuple('Link', ['file', 'text', 'url', 'kind'])
+
+# Below this many files, process start-up costs more than parsing serially
+PARALLEL_MIN_FILES = 2000
+
+
+class MdxDocument:
+    """
+    A parsed MDX file.
+    
+    The file text is stored once in ``raw_content``; ``content`` is the body past
+    the frontmatter, sliced out on access from stored offsets, and ``filename``
+    is derived from ``path`` on demand. Supports ``doc['key']`` lookups for code
+    written against the old per-file dictionaries.
+    """
+    __slots__ = ('path', 'raw_content', 'metadata', 'body_start', 'body_end', 'error')
+    
+    def __init__(self, path, raw_content, metadata, body_start=0, body_end=None, error=None):
+        self.path = path
+        self.raw_content = raw_content
+        self.metadata = metadata
+        self.body_start = body_start
+        self.body_end = len(raw_content) if body_end is None and raw_content is not None else body_end
+        self.error = error
+    
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+    
+    @property
+    def content(self):
+        if self.raw_content is None:
+            return None
+        return self.raw_content[self.body_start:self.body_end]
+    
+    def __getitem__(self, key):
+        if key not in ('path', 'filename', 'metadata', 'content', 'raw_content', 'error'):
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def to_dict(self):
+        """Return the document in the legacy dictionary layout."""
+        data = {
+            'path': self.path,
+            'filename': self.filename,
+            'metadata': self.metadata,
+            'content': self.content,
+            'raw_content': self.raw_content
+        }
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+    
+    def __repr__(self):
+        return f"MdxDocument(path={self.path!r}, metadata={self.metadata!r})"
 
 
 class LocalMDXReader:
@@ -20,6 +106,32 @@ class LocalMDXReader:
         """
         self.directory_path = directory_path
     
+    def iter_mdx_paths(self, directory_path=None):
+        """
+        Lazily walk the directory tree yielding MDX file paths
+        
+        Entries are visited in sorted order so every run sees the same sequence.
+        
+        Args:
+            directory_path (str): Directory to walk (defaults to the reader's directory)
+            
+        Yields:
+            str: Path of each file with .mdx extension
+        """
+        directory_path = directory_path or self.directory_path
+        try:
+            with os.scandir(directory_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error scanning {directory_path}: {e}")
+            return
+        
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from self.iter_mdx_paths(entry.path)
+            elif entry.name.endswith(".mdx") and entry.is_file():
+                yield entry.path
+    
     def get_mdx_files(self):
         """
         Get all MDX files from the specified directory and its subdirectories
@@ -27,43 +139,69 @@ class LocalMDXReader:
         Returns:
             list: List of file paths with .mdx extension
         """
-        # Get all .mdx files in the directory and subdirectories
-        mdx_pattern = os.path.join(self.directory_path, "**", "*.mdx")
-        mdx_files = glob.glob(mdx_pattern, recursive=True)
+        return list(self.iter_mdx_paths())
+    
+    def parse_metadata(self, frontmatter_str):
+        """
+        Parse the text between the frontmatter delimiters into a dictionary
         
-        return mdx_files
+        Args:
+            frontmatter_str (str): Frontmatter text without the --- delimiters
+            
+        Returns:
+            dict: Frontmatter keys mapped to their values
+        """
+        metadata = {}
+        for line in frontmatter_str.strip().split('\n'):
+            if ':' in line:
+                key, value = line.split(':', 1)
+                metadata[key.strip()] = value.strip()
+        return metadata
     
-    def parse_frontmatter(self, content):
+    def split_frontmatter(self, content):
         """
-        Parse frontmatter from MDX content
+        Parse frontmatter from MDX content without copying the body
         
         Args:
             content (str): Content of the MDX file
             
         Returns:
-            tuple: (metadata, content_without_frontmatter)
+            tuple: (metadata, body_start, body_end) where content[body_start:body_end]
+                is the stripped body after the frontmatter
         """
         # Check if content starts with frontmatter delimiter
         if not content.startswith('---'):
-            return {}, content
+            return {}, 0, len(content)
         
         # Find the second frontmatter delimiter
-        parts = content.split('---', 2)
-        if len(parts) < 3:
-            return {}, content
+        closing = content.find('---', 3)
+        if closing == -1:
+            return {}, 0, len(content)
         
-        # Extract frontmatter and content
-        frontmatter_str = parts[1].strip()
-        content_without_frontmatter = parts[2].strip()
+        metadata = self.parse_metadata(content[3:closing])
         
-        # Parse frontmatter into dictionary
-        metadata = {}
-        for line in frontmatter_str.split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                metadata[key.strip()] = value.strip()
+        # Offsets of the body with surrounding whitespace trimmed
+        body_start = closing + 3
+        body_end = len(content)
+        while body_start < body_end and content[body_start].isspace():
+            body_start += 1
+        while body_end > body_start and content[body_end - 1].isspace():
+            body_end -= 1
         
-        return metadata, content_without_frontmatter
+        return metadata, body_start, body_end
+    
+    def parse_frontmatter(self, content):
+        """
+        Parse frontmatter from MDX content
+        
+        Args:
+            content (str): Content of the MDX file
+            
+        Returns:
+            tuple: (metadata, content_without_frontmatter)
+        """
+        metadata, body_start, body_end = self.split_frontmatter(content)
+        return metadata, content[body_start:body_end]
     
     def read_mdx_file(self, file_path):
         """
@@ -73,114 +211,244 @@ class LocalMDXReader:
             file_path (str): Path to the MDX file
             
         Returns:
-            dict: Dictionary containing the metadata and content of the MDX file
+            MdxDocument: The metadata and content of the MDX file
         """
         try:
             # Read file content
             with open(file_path, 'r', encoding='utf-8') as file:
                 content = file.read()
             
-            # Parse frontmatter and content
-            metadata, content_without_frontmatter = self.parse_frontmatter(content)
+            # Parse frontmatter and locate the body
+            metadata, body_start, body_end = self.split_frontmatter(content)
             
-            return {
-                'path': file_path,
-                'filename': os.path.basename(file_path),
-                'metadata': metadata,
-                'content': content_without_frontmatter,
-                'raw_content': content
-            }
+            return MdxDocument(file_path, content, metadata, body_start, body_end)
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
-            return {
-                'path': file_path,
-                'filename': os.path.basename(file_path),
-                'metadata': {},
-                'content': None,
-                'raw_content': None,
-                'error': str(e)
-            }
+            return MdxDocument(file_path, None, {}, error=str(e))
+    
+    def read_frontmatter(self, file_path, chunk_size=4096, max_chars=65536):
+        """
+        Read only the frontmatter of an MDX file, skipping the body
+        
+        The file is read in ``chunk_size`` pieces until the closing ``---``
+        delimiter is found, so the cost does not depend on page length.
+        
+        Args:
+            file_path (str): Path to the MDX file
+            chunk_size (int): Characters read per call
+            max_chars (int): Give up after this many characters without a closing delimiter
+            
+        Returns:
+            dict: Frontmatter metadata (empty if the file has none or could not be read)
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                buffer = file.read(chunk_size)
+                if not buffer.startswith('---'):
+                    return {}
+                
+                search_from = 3
+                while True:
+                    closing = buffer.find('---', search_from)
+                    if closing != -1:
+                        return self.parse_metadata(buffer[3:closing])
+                    if len(buffer) >= max_chars:
+                        return {}
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        return {}
+                    # Re-check the tail in case the delimiter straddles two chunks
+                    search_from = max(3, len(buffer) - 2)
+                    buffer += chunk
+        except Exception as e:
+            print(f"Error reading frontmatter of {file_path}: {e}")
+            return {}
+    
+    def iter_frontmatter(self, path_filter=None):
+        """
+        Lazily scan the frontmatter of every MDX file without reading page bodies
+        
+        Args:
+            path_filter (callable): Optional predicate; paths for which it returns False are skipped
+            
+        Yields:
+            tuple: (file_path, metadata) in the same order as iter_mdx_paths
+        """
+        for file_path in self.iter_mdx_paths():
+            if path_filter is None or path_filter(file_path):
+                yield file_path, self.read_frontmatter(file_path)
+    
+    def iter_mdx_files(self, path_filter=None):
+        """
+        Lazily read and parse MDX files one at a time
+        
+        Only one document is held in memory at a time, and the first document is
+        available as soon as it is read instead of after the whole scan.
+        
+        Args:
+            path_filter (callable): Optional predicate; paths for which it returns False are not read
+            
+        Yields:
+            MdxDocument: File information and content, in the same order as iter_mdx_paths
+        """
+        for file_path in self.iter_mdx_paths():
+            if path_filter is None or path_filter(file_path):
+                yield self.read_mdx_file(file_path)
     
-    def process_all_mdx_files(self):
+    def process_all_mdx_files(self, parallel=None, workers=None, chunk_size=256):
         """
         Process all MDX files in the directory
         
+        Args:
+            parallel (bool): Parse across a process pool; None decides from the corpus size
+            workers (int): Number of worker processes (defaults to the CPU count)
+            chunk_size (int): Files handed to a worker per task
+            
         Returns:
-            list: List of dictionaries containing file information and content
+            list: List of MdxDocument objects containing file information and content
         """
         mdx_files = self.get_mdx_files()
-        result = []
-        
         print(f"Found {len(mdx_files)} MDX files in {self.directory_path}")
         
-        for file_path in mdx_files:
-            print(f"Processing {file_path}...")
-            file_data = self.read_mdx_file(file_path)
-            # print(file_data)
-            # break
-            result.append(file_data)
+        if parallel is None:
+            parallel = len(mdx_files) >= PARALLEL_MIN_FILES and (os.cpu_count() or 1) > 1
+        if parallel:
+            documents, _ = self.parse_files_parallel(mdx_files, workers=workers, chunk_size=chunk_size)
+            return documents
         
-        return result
+        return [self.read_mdx_file(file_path) for file_path in mdx_files]
+    
+    def parse_files_parallel(self, file_paths, workers=None, chunk_size=256, with_links=False):
+        """
+        Read, parse and optionally extract links from files across a process pool
+        
+        Files are sent to workers in chunks and results come back in the same
+        order as ``file_paths``, matching the serial path exactly. Falls back to
+        parsing serially if a process pool cannot be started.
+        
+        Args:
+            file_paths (list): Paths of the MDX files to parse
+            workers (int): Number of worker processes (defaults to the CPU count)
+            chunk_size (int): Files handed to a worker per task
+            with_links (bool): Also run extract_links inside the workers
+            
+        Returns:
+            tuple: (list of MdxDocument, dict of links by file path or None)
+        """
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+        documents = []
+        links_by_file = {} if with_links else None
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _parse_mdx_chunk,
+                    [self.directory_path] * len(chunks),
+                    chunks,
+                    [with_links] * len(chunks)
+                ))
+        except (OSError, RuntimeError) as e:
+            print(f"Process pool unavailable ({e}), parsing serially")
+            results = [_parse_mdx_chunk(self.directory_path, chunk, with_links) for chunk in chunks]
+        
+        for chunk_documents, chunk_links in results:
+            documents.extend(chunk_documents)
+            if with_links:
+                links_by_file.update(chunk_links)
+        
+        return documents, links_by_file
+    
+    def iter_links(self, mdx_files_data):
+        """
+        Stream every link in the MDX files
+        
+        Pages are first searched for anything link-shaped; most have none and
+        are passed over without looking for fences. On the rest, fenced code
+        blocks are split out and their links ignored, and the text between them
+        is scanned once for every kind of link.
+        
+        Args:
+            mdx_files_data (iterable): Documents containing file information and content
+            
+        Yields:
+            Link: (file, text, url, kind) records in document order
+        """
+        for file_data in mdx_files_data:
+            text = file_data.raw_content
+            if text is None:
+                continue
+            # Search the body in place rather than slicing it out of the file text
+            start, end = file_data.body_start, file_data.body_end
+            if (MARKDOWN_LINK_PATTERN.search(text, start, end) is None
+                    and HTML_LINK_PATTERN.search(text, start, end) is None):
+                continue
+            file_path = file_data.path
+            # The fence's capture group comes back between the segments
+            for segment in FENCED_BLOCK_PATTERN.split('\n' + text[start:end])[::2]:
+                # findall builds the group tuples in C
+                for image_text, image_url, link_text, url, html_url, html_text in LINK_PATTERN.findall(segment):
+                    if url:
+                        yield Link(file_path, link_text, url, 'markdown')
+                    elif image_url:
+                        yield Link(file_path, image_text, image_url, 'image')
+                    elif html_url or html_text:
+                        yield Link(file_path, html_text, html_url, 'html')
     
     def extract_links(self, mdx_files_data):
         """
         Extract all links from the MDX files
         
         Args:
-            mdx_files_data (list): List of dictionaries containing file information and content
+            mdx_files_data (iterable): Documents containing file information and content,
+                e.g. a list from process_all_mdx_files or the iter_mdx_files generator
             
         Returns:
             dict: Dictionary mapping file paths to their links
         """
         links_by_file = {}
         
-        # Regular expression to find markdown and HTML links
-        markdown_link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-        html_link_pattern = r'<a\s+[^>]*href=["\'](.*?)["\'][^>]*>(.*?)<\/a>'
-        
         for file_data in mdx_files_data:
-            file_path = file_data['path']
-            content = file_data['content']
-            
-            if content is None:
-                links_by_file[file_path] = []
-                continue
-            
-            # Find markdown links
-            markdown_links = re.findall(markdown_link_pattern, content)
-            
-            # Find HTML links
-            html_links = re.findall(html_link_pattern, content)
-            
-            # Combine links
-            all_links = [
-                {'text': text, 'url': url} for text, url in markdown_links
-            ] + [
-                {'text': text, 'url': url} for url, text in html_links
+            links_by_file[file_data.path] = [
+                {'text': link.text, 'url': link.url} for link in self.iter_links((file_data,))
             ]
-            
-            links_by_file[file_path] = all_links
         
         return links_by_file
-    
+
+
+def _parse_mdx_chunk(directory_path, file_paths, with_links=False):
+    """Worker for LocalMDXReader.parse_files_parallel; module level so it can be pickled."""
+    reader = LocalMDXReader(directory_path)
+    documents = [reader.read_mdx_file(file_path) for file_path in file_paths]
+    links_by_file = reader.extract_links(documents) if with_links else None
+    return documents, links_by_file
+
+
 class MCQGenerator:
-    def __init__(self, api_key: str):
-        """Initialize the MCQ Generator with your OpenAI API key."""
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, rate_limiter: RateLimiter = None, cache: ResponseCache = None):
+        """Initialize the MCQ Generator with your OpenAI API key, an optional shared rate limiter and response cache."""
+        self.client = self.create_client(api_key)
         self.model = "gpt-4"
+        self.temperature = 0.0
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = ExtractionMetrics()
     
-    def generate_mcqs(self, text: str, num_questions: int = 5) -> List[Dict[str, Any]]:
+    def create_client(self, api_key: str):
+        """Build the API client requests are sent through; subclasses override this to swap it."""
+        return OpenAI(api_key=api_key)
+    
+    def build_prompt(self, text: str, num_questions: int = 5) -> str:
         """
-        Generate multiple-choice questions from the provided text.
+        Build the chat prompt asking for multiple-choice questions about a text.
         
         Args:
             text: The text to generate questions from
             num_questions: Number of questions to generate (default: 5)
             
         Returns:
-            A list of dictionaries, each containing a question, options, and the correct answer
+            The prompt string sent to the model
         """
-        prompt = f"""
+        return f"""
         Generate {num_questions} multiple-choice questions based on the following text. 
         For each question, provide four options (A, B, C, D) with exactly one correct answer.
         
@@ -202,34 +470,626 @@ class MCQGenerator:
         Here is the text:
         {text}
         """
+    
+    def build_remainder_prompt(self, text: str, num_questions: int, existing: List[Dict[str, Any]]) -> str:
+        """
+        Build a prompt asking only for the questions a previous response did not deliver.
+        
+        Args:
+            text: The text the questions are about
+            num_questions: Number of questions still missing
+            existing: Questions already salvaged, which the new ones must not repeat
+            
+        Returns:
+            The prompt string sent to the model
+        """
+        prompt = self.build_prompt(text, num_questions)
+        if not existing:
+            return prompt
+        asked = "\n".join(f"- {question['question']}" for question in existing)
+        return f"""{prompt}
+        Do not repeat any of these questions, which have already been written:
+        {asked}
+        """
+    
+    def parse_response(self, prompt: str, content: str) -> List[Dict[str, Any]]:
+        """Extract the valid questions from a response and record how much of it was usable."""
+        extraction = extract_questions(content)
+        self.metrics.record(prompt, content, extraction)
+        return extraction.questions
+    
+    def merge_remainder(self, questions: List[Dict[str, Any]], remainder: List[Dict[str, Any]],
+                        num_questions: int) -> List[Dict[str, Any]]:
+        """Append remainder questions that do not repeat one already salvaged, up to num_questions."""
+        seen = {question["question"].strip().lower() for question in questions}
+        for question in remainder:
+            if len(questions) >= num_questions:
+                break
+            if question["question"].strip().lower() not in seen:
+                seen.add(question["question"].strip().lower())
+                questions.append(question)
+        return questions
+    
+    def build_packed_prompt(self, texts: Dict[str, str], num_questions: int = 5) -> str:
+        """
+        Build one prompt asking for questions about several documents at once.
+        
+        Args:
+            texts: Mapping of short document id to document text
+            num_questions: Number of questions to generate per document
+            
+        Returns:
+            The prompt string, whose answer is a JSON object keyed by document id
+        """
+        documents = "\n".join(f'<document id="{doc_id}">\n{text}\n</document>' for doc_id, text in texts.items())
+        return f"""
+        For EACH document below, generate {num_questions} multiple-choice questions based only on that document's text.
+        For each question, provide four options (A, B, C, D) with exactly one correct answer.
+        
+        Format the output as a JSON object mapping every document id to its array of questions:
+        {{
+            "{next(iter(texts))}": [
+                {{
+                    "question": "The question text",
+                    "options": {{
+                        "A": "First option",
+                        "B": "Second option",
+                        "C": "Third option",
+                        "D": "Fourth option"
+                    }},
+                    "correct_answer": "The letter of the correct option (A, B, C, or D)"
+                }},
+                ...
+            ],
+            ...
+        }}
+        
+        Here are the documents:
+        {documents}
+        """
+    
+    def packed_cache_lookup(self, texts: List[str], num_questions: int, bypass_cache: bool = False):
+        """
+        Split a packed batch into pages already in the cache and pages still to request.
+        
+        Pages are cached under the same key as a single-page request, so a page
+        generated in one pack is reused whichever pack, if any, it lands in next.
+        
+        Returns:
+            tuple: (questions per page, with [] for misses; {doc id: (page index, cache key)} for misses)
+        """
+        results = [[] for _ in texts]
+        pending = {}
+        for i, text in enumerate(texts):
+            cache_key, cached = self.cache_lookup(self.build_prompt(text, num_questions), num_questions, bypass_cache)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[f"doc-{i + 1}"] = (i, cache_key)
+        return results, pending
+    
+    def store_packed_response(self, prompt: str, content: str, pending: Dict[str, Any],
+                              results: List[List[Dict[str, Any]]]) -> None:
+        """Split a packed response back into per-page question lists; pages missing from it, or cut off, stay empty."""
+        answers = extract_object(content) or {}
+        stored = []
+        for doc_id, (i, cache_key) in pending.items():
+            questions = answers.get(doc_id)
+            questions = [question for question in questions if is_valid_question(question)] \
+                if isinstance(questions, list) else []
+            if questions:
+                results[i] = questions
+                stored.extend(questions)
+                self.cache_store(cache_key, questions)
+            else:
+                print(f"Packed response has no questions for {doc_id}")
+        complete = all(results[i] for i, _ in pending.values())
+        self.metrics.record(prompt, content, Extraction(stored, complete, ""))
+    
+    def estimate_request_tokens(self, prompt: str, num_questions: int) -> int:
+        """Estimate the prompt plus completion tokens a request will be charged."""
+        return estimate_tokens(prompt, num_questions * COMPLETION_TOKENS_PER_QUESTION)
+    
+    def record_usage(self, response, estimated_tokens: int) -> None:
+        """Correct the rate limiter's reservation with the usage reported by the API."""
+        usage = getattr(response, "usage", None)
+        if self.rate_limiter and usage is not None:
+            self.rate_limiter.record_usage(estimated_tokens, usage.total_tokens)
+    
+    def complete(self, prompt: str, num_questions: int):
+        """
+        Send one chat request within the rate limits and return the reply text.
+        
+        Every synchronous request goes through here, so subclasses can defer or
+        replay requests (see batch_jobs) without changing how prompts are built
+        or responses are parsed.
+        
+        Args:
+            prompt: The full prompt
+            num_questions: Total questions the prompt asks for, used to budget completion tokens
+            
+        Returns:
+            The message content, or None if the request was deferred
+        """
+        estimated_tokens = self.estimate_request_tokens(prompt, num_questions)
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimated_tokens)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+        )
+        self.record_usage(response, estimated_tokens)
+        return response.choices[0].message.content
+    
+    def cache_lookup(self, prompt: str, num_questions: int, bypass_cache: bool = False):
+        """
+        Look up a previous response for an identical request.
+        
+        Returns:
+            tuple: (cache key or None, cached questions or None)
+        """
+        if self.cache is None or bypass_cache:
+            return None, None
+        key = ResponseCache.make_key(self.model, prompt, self.temperature, num_questions)
+        return key, self.cache.get(key)
+    
+    def cache_store(self, key, questions: List[Dict[str, Any]]) -> None:
+        """Remember a successful response; failed or empty responses are never cached."""
+        if key is not None and questions:
+            self.cache.set(key, questions)
+    
+    def generate_mcqs(self, text: str, num_questions: int = 5, bypass_cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        Generate multiple-choice questions from the provided text.
+        
+        Args:
+            text: The text to generate questions from
+            num_questions: Number of questions to generate (default: 5)
+            bypass_cache: Always call the API, ignoring any cached response
+            
+        Returns:
+            A list of dictionaries, each containing a question, options, and the correct answer
+        """
+        prompt = self.build_prompt(text, num_questions)
+        cache_key, cached = self.cache_lookup(prompt, num_questions, bypass_cache)
+        if cached is not None:
+            return cached
+        
+        try:
+            content = self.complete(prompt, num_questions)
+        except Exception as e:
+            self.metrics.record_error()
+            print(f"Error generating MCQs: {e}")
+            return []
+        if content is None:
+            return []
+        
+        # Tolerates fences, prefaces and truncation; keeps whatever questions are complete
+        questions = self.parse_response(prompt, content)
+        missing = num_questions - len(questions)
+        if missing > 0:
+            # Ask only for what is missing rather than re-running the whole request
+            self.metrics.remainder_requests += 1
+            remainder_prompt = self.build_remainder_prompt(text, missing, questions)
+            try:
+                content = self.complete(remainder_prompt, missing)
+            except Exception as e:
+                # The salvaged questions are still good; keep them rather than paying for them again
+                self.metrics.record_error()
+                print(f"Error requesting {missing} remaining MCQs: {e}")
+                content = None
+            if content is not None:
+                self.merge_remainder(questions, self.parse_response(remainder_prompt, content), num_questions)
+        self.cache_store(cache_key, questions)
+        
+        return questions
+    
+    def stream_mcqs(self, text: str, num_questions: int = 5, bypass_cache: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Generate questions from the text, yielding each one as soon as it is complete.
+        
+        The completion is streamed and its JSON array parsed incrementally, so the
+        caller can validate, dedupe or store the first question while the model is
+        still writing the rest. The full list is cached once the array closes.
+        
+        Args:
+            text: The text to generate questions from
+            num_questions: Number of questions to generate (default: 5)
+            bypass_cache: Always call the API, ignoring any cached response
+            
+        Yields:
+            Question dictionaries in the order the model writes them
+        """
+        prompt = self.build_prompt(text, num_questions)
+        cache_key, cached = self.cache_lookup(prompt, num_questions, bypass_cache)
+        if cached is not None:
+            yield from cached
+            return
+        estimated_tokens = self.estimate_request_tokens(prompt, num_questions)
+        parser = IncrementalArrayParser()
+        questions = []
         
         try:
-            response = self.client.chat.completions.create(
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens)
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.0,
+                temperature=self.temperature,
+                stream=True,
+                stream_options={"include_usage": True},
             )
+            for chunk in stream:
+                # The final chunk carries the usage and no choices
+                if chunk.usage is not None:
+                    self.record_usage(chunk, estimated_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    for question in parser.feed(chunk.choices[0].delta.content):
+                        if is_valid_question(question):
+                            questions.append(question)
+                            yield question
+        except Exception as e:
+            self.metrics.record_error()
+            print(f"Error streaming MCQs: {e}")
+            return
+        
+        if parser.finished:
+            self.cache_store(cache_key, questions)
+    
+    def generate_page_mcqs(self, text: str, num_questions: int = 5, bypass_cache: bool = False,
+                           max_section_tokens: int = MAX_SECTION_TOKENS) -> List[Dict[str, Any]]:
+        """
+        Generate questions for a whole page, one request per token-budgeted section.
+        
+        Pages that fit in a single section are sent as-is. Longer pages are split on
+        headings and code fences, the question budget is shared out by section size,
+        and the sections' questions are merged back in document order. If any
+        section fails the page returns no questions, so it is retried on the next
+        run; sections that succeeded are then served from the cache.
+        
+        Args:
+            text: The page body
+            num_questions: Number of questions for the whole page (default: 5)
+            bypass_cache: Always call the API, ignoring any cached response
+            max_section_tokens: Prompt budget for one section's text
             
-            # Extract the JSON content from the response
-            content = response.choices[0].message.content
-            
-            # Parse the JSON string into a Python object
-            questions = json.loads(content)
+        Returns:
+            A list of dictionaries, each containing a question, options, and the correct answer
+        """
+        sections = split_sections(text, max_section_tokens)
+        if len(sections) <= 1:
+            return self.generate_mcqs(text, num_questions, bypass_cache)
+        results = [
+            self.generate_mcqs(section.text, count, bypass_cache)
+            for section, count in zip(sections, allocate_questions(sections, num_questions)) if count
+        ]
+        if not all(results):
+            return []
+        return [question for section_questions in results for question in section_questions]
+    
+    def generate_packed_mcqs(self, texts: List[str], num_questions: int = 5,
+                             bypass_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Generate questions for several small pages in a single request.
+        
+        The instruction header is sent once for the whole batch, and the model
+        answers with one question array per document id, which is split back
+        into per-page lists.
+        
+        Args:
+            texts: Page bodies, e.g. one batch from pack_documents
+            num_questions: Number of questions to generate per page (default: 5)
+            bypass_cache: Always call the API, ignoring any cached response
             
-            return questions
+        Returns:
+            One list of questions per page, aligned with ``texts``; [] for pages that failed
+        """
+        results, pending = self.packed_cache_lookup(texts, num_questions, bypass_cache)
+        if not pending:
+            return results
+        prompt = self.build_packed_prompt({doc_id: texts[i] for doc_id, (i, _) in pending.items()}, num_questions)
+        
+        try:
+            content = self.complete(prompt, num_questions * len(pending))
+        except Exception as e:
+            self.metrics.record_error()
+            print(f"Error generating packed MCQs: {e}")
+            return results
+        if content is not None:
+            self.store_packed_response(prompt, content, pending, results)
+        return results
+    
+    def generate_batch(self, batch: List[MdxDocument], num_questions: int = 5,
+                       bypass_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """Generate one batch from pack_documents: a single page on its own, or several packed together."""
+        if len(batch) == 1:
+            return [self.generate_page_mcqs(batch[0].content, num_questions, bypass_cache)]
+        return self.generate_packed_mcqs([document.content for document in batch], num_questions, bypass_cache)
+    
+    def save_to_file(self, questions: List[Dict[str, Any]], filename: str = "mcqs.json") -> bool:
+        """
+        Save the generated questions to a JSON file, or a compact indexed question bank for .jsonl paths.
+        
+        Returns:
+            bool: True if the file was written
+        """
+        try:
+            if filename.endswith(".jsonl"):
+                QuestionBank(filename).write(questions)
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(questions, f, indent=2)
+            print(f"MCQs saved to {filename}")
+            return True
+        except Exception as e:
+            print(f"Error saving to file: {e}")
+            return False
+
+class AsyncMCQGenerator(MCQGenerator):
+    def __init__(self, api_key: str, concurrency: int = 8, rate_limiter: RateLimiter = None,
+                 cache: ResponseCache = None):
+        """
+        Initialize the asynchronous MCQ Generator
+        
+        Args:
+            api_key: Your OpenAI API key
+            concurrency: Maximum number of requests in flight at once (default: 8)
+            rate_limiter: Optional limiter shared with other generators
+            cache: Optional response cache shared with other generators
+        """
+        super().__init__(api_key, rate_limiter=rate_limiter, cache=cache)
+        self.concurrency = max(1, concurrency)
+        self._slots_loop = None
+        self._slots = None
+    
+    def create_client(self, api_key: str):
+        return AsyncOpenAI(api_key=api_key)
+    
+    @property
+    def _request_slots(self):
+        """
+        Semaphore bounding requests in flight across all pages, whose sections run concurrently
+        
+        A semaphore binds to the event loop it is first awaited on, so one is made
+        per running loop; the generator can then be driven by successive asyncio.run calls.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._slots_loop:
+            self._slots_loop = loop
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+    
+    async def complete(self, prompt: str, num_questions: int):
+        """Send one chat request within the rate limits and the generator's request slots; see MCQGenerator.complete."""
+        estimated_tokens = self.estimate_request_tokens(prompt, num_questions)
+        async with self._request_slots:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async(estimated_tokens)
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+            )
+        self.record_usage(response, estimated_tokens)
+        return response.choices[0].message.content
+    
+    async def generate_mcqs(self, text: str, num_questions: int = 5,
+                            bypass_cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        Generate multiple-choice questions from the provided text without blocking the event loop.
+        
+        Args:
+            text: The text to generate questions from
+            num_questions: Number of questions to generate (default: 5)
+            bypass_cache: Always call the API, ignoring any cached response
             
+        Returns:
+            A list of dictionaries, each containing a question, options, and the correct answer
+        """
+        prompt = self.build_prompt(text, num_questions)
+        cache_key, cached = self.cache_lookup(prompt, num_questions, bypass_cache)
+        if cached is not None:
+            return cached
+        
+        try:
+            content = await self.complete(prompt, num_questions)
         except Exception as e:
+            self.metrics.record_error()
             print(f"Error generating MCQs: {e}")
             return []
+        if content is None:
+            return []
+        
+        questions = self.parse_response(prompt, content)
+        missing = num_questions - len(questions)
+        if missing > 0:
+            self.metrics.remainder_requests += 1
+            remainder_prompt = self.build_remainder_prompt(text, missing, questions)
+            try:
+                content = await self.complete(remainder_prompt, missing)
+            except Exception as e:
+                self.metrics.record_error()
+                print(f"Error requesting {missing} remaining MCQs: {e}")
+                content = None
+            if content is not None:
+                self.merge_remainder(questions, self.parse_response(remainder_prompt, content), num_questions)
+        self.cache_store(cache_key, questions)
+        
+        return questions
+    
+    async def stream_mcqs(self, text: str, num_questions: int = 5,
+                          bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate questions from the text, yielding each one as soon as it is complete.
+        
+        Async counterpart of MCQGenerator.stream_mcqs; the request holds one of the
+        generator's request slots until the stream ends.
+        """
+        prompt = self.build_prompt(text, num_questions)
+        cache_key, cached = self.cache_lookup(prompt, num_questions, bypass_cache)
+        if cached is not None:
+            for question in cached:
+                yield question
+            return
+        estimated_tokens = self.estimate_request_tokens(prompt, num_questions)
+        parser = IncrementalArrayParser()
+        questions = []
+        
+        try:
+            async with self._request_slots:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire_async(estimated_tokens)
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=self.temperature,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        self.record_usage(chunk, estimated_tokens)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        for question in parser.feed(chunk.choices[0].delta.content):
+                            if is_valid_question(question):
+                                questions.append(question)
+                                yield question
+        except Exception as e:
+            self.metrics.record_error()
+            print(f"Error streaming MCQs: {e}")
+            return
+        
+        if parser.finished:
+            self.cache_store(cache_key, questions)
+    
+    async def generate_page_mcqs(self, text: str, num_questions: int = 5, bypass_cache: bool = False,
+                                 max_section_tokens: int = MAX_SECTION_TOKENS) -> List[Dict[str, Any]]:
+        """
+        Generate questions for a whole page with its sections requested concurrently.
+        
+        Same splitting and merging as MCQGenerator.generate_page_mcqs; sections share
+        the generator's request slots with every other page in flight.
+        """
+        sections = split_sections(text, max_section_tokens)
+        if len(sections) <= 1:
+            return await self.generate_mcqs(text, num_questions, bypass_cache)
+        jobs = [
+            self.generate_mcqs(section.text, count, bypass_cache)
+            for section, count in zip(sections, allocate_questions(sections, num_questions)) if count
+        ]
+        results = await asyncio.gather(*jobs)
+        if not all(results):
+            return []
+        return [question for section_questions in results for question in section_questions]
     
-    def save_to_file(self, questions: List[Dict[str, Any]], filename: str = "mcqs.json") -> None:
-        """Save the generated questions to a JSON file."""
+    async def generate_packed_mcqs(self, texts: List[str], num_questions: int = 5,
+                                   bypass_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """Generate questions for several small pages in one request; see MCQGenerator.generate_packed_mcqs."""
+        results, pending = self.packed_cache_lookup(texts, num_questions, bypass_cache)
+        if not pending:
+            return results
+        prompt = self.build_packed_prompt({doc_id: texts[i] for doc_id, (i, _) in pending.items()}, num_questions)
+        
         try:
-            with open(filename, 'w') as f:
-                json.dump(questions, f, indent=2)
-            print(f"MCQs saved to {filename}")
+            content = await self.complete(prompt, num_questions * len(pending))
         except Exception as e:
-            print(f"Error saving to file: {e}")
+            self.metrics.record_error()
+            print(f"Error generating packed MCQs: {e}")
+            return results
+        if content is not None:
+            self.store_packed_response(prompt, content, pending, results)
+        return results
+    
+    async def generate_batch(self, batch: List[MdxDocument], num_questions: int = 5,
+                             bypass_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """Generate one batch from pack_documents: a single page on its own, or several packed together."""
+        if len(batch) == 1:
+            return [await self.generate_page_mcqs(batch[0].content, num_questions, bypass_cache)]
+        return await self.generate_packed_mcqs([document.content for document in batch], num_questions,
+                                               bypass_cache)
+    
+    async def generate_many(self, mdx_files_data: Iterable[MdxDocument], num_questions: int = 5,
+                            output_dir: str = "questions", bypass_cache: bool = False,
+                            output_format: str = "json",
+                            max_packed_documents: int = MAX_PACKED_DOCUMENTS,
+                            pages_dir: str = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Generate MCQs for many MDX files concurrently.
+        
+        At most ``self.concurrency`` requests are in flight at once, counting the
+        sections of long pages, which are requested side by side. Small pages are
+        packed several to a request by pack_documents. Input is consumed
+        lazily, and each ``<output_dir>/<topic key>.<output_format>`` file is written as soon as
+        all of its sections arrive rather than after the whole batch completes.
+        
+        Args:
+            mdx_files_data: Iterable of MdxDocument objects as returned by LocalMDXReader
+            num_questions: Number of questions to generate per file (default: 5)
+            output_dir: Directory the per-file JSON outputs are written to
+            bypass_cache: Always call the API, ignoring any cached response
+            output_format: "json" for pretty-printed files, "jsonl" for indexed question banks
+            max_packed_documents: Most small pages per request; 1 disables packing
+            pages_dir: Root of the pages tree that output names are relative to (see question_output_path)
+            
+        Returns:
+            dict: Mapping of file path to its generated questions, in input order; empty for pages
+                  whose output could not be written
+        """
+        results = {}
+        pending = set()
+        
+        async def _generate(batch):
+            page_questions = await self.generate_batch(batch, num_questions=num_questions, bypass_cache=bypass_cache)
+            saved = []
+            for file_data, questions in zip(batch, page_questions):
+                # An empty or unwritten file would hide the failure; the page stays stale and is retried
+                if questions and not self.save_to_file(questions, question_output_path(file_data.path, output_dir,
+                                                                                       output_format, pages_dir)):
+                    questions = []
+                saved.append((file_data.path, questions))
+            return saved
+        
+        def _collect(done):
+            for task in done:
+                for path, questions in task.result():
+                    results[path] = questions
+        
+        def _reserve(documents):
+            # Reserve each page's slot as it is read so results keep the input order despite packing
+            for file_data in documents:
+                if file_data.content:
+                    results[file_data.path] = []
+                    yield file_data
+        
+        for batch in pack_documents(_reserve(mdx_files_data), max_documents=max_packed_documents):
+            if len(pending) >= self.concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                _collect(done)
+            pending.add(asyncio.create_task(_generate(batch)))
+        
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            _collect(done)
+        
+        return results
+
+def question_output_path(mdx_path, output_dir="questions", output_format="json", pages_dir=None):
+    """
+    Return the path of the question file generated from an MDX page ("json" or "jsonl").
+    
+    The file is named after the page's path relative to ``pages_dir`` with its
+    segments joined by "_" (angular/decorators.mdx -> angular_decorators.json),
+    the same topic key QuizPage.astro derives from the page URL, so pages sharing
+    a file name in different sections get separate outputs. Without ``pages_dir``
+    only the file stem is used.
+    """
+    if pages_dir is None:
+        name = Path(mdx_path).stem
+    else:
+        name = "_".join(Path(os.path.relpath(mdx_path, pages_dir)).with_suffix("").parts)
+    return os.path.join(output_dir, f"{name}.{output_format}")
+
 
 def load_api_key():
     """
@@ -253,36 +1113,70 @@ def load_api_key():
     return api_key
 
 
-def main():
+def main(concurrency=8, requests_per_minute=500, tokens_per_minute=10000, bypass_cache=False,
+         output_format="json"):
     # Set the directory containing your MDX files
     mdx_directory = "..\pages"  # Change this to your local directory
     api_key = load_api_key()
-    generator = MCQGenerator(api_key)
-    reader = LocalMDXReader(mdx_directory)    # Get all MDX files and their content
-    mdx_files_data = reader.process_all_mdx_files()
+    reader = LocalMDXReader(mdx_directory)
+    # Outputs are named by path relative to the pages root, so same-named pages never share one
+    def output_path_for(path):
+        return question_output_path(path, output_format=output_format, pages_dir=mdx_directory)
+
+    # Only pages that changed since the last run need new questions
+    manifest = GenerationManifest()
+    mdx_files = reader.get_mdx_files()
+    removed = manifest.prune(mdx_files)
+    print(f"Found {len(mdx_files)} MDX files, pruned {len(removed)} outputs of deleted pages")
+    # Documents stream into generation one at a time as they are read
+    mdx_files_data = reader.iter_mdx_files(
+        path_filter=lambda path: manifest.is_stale(path, output_path_for(path))
+    )
     
     print("\n==== MDX File Details ====")
     # print(mdx_files_data)
 
-    for index,file_data in tqdm(enumerate(mdx_files_data)):
-        if index%20==0 and index !=0:
-            print("Sleeping")
-            time.sleep(60) 
-        print(f"\nFile: {file_data['path']}")
-        print(f"Metadata: {file_data['metadata']}")
-        if file_data['content']:
-            # print(mcqs)
-            questions = generator.generate_mcqs(file_data['content'], num_questions=10)
-    
-    # Print the generated questions
+    # Shared budget so sync and async paths throttle only as much as the API limits require
+    rate_limiter = RateLimiter(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+    # Identical page, prompt and settings as a previous run -> reuse the stored response
+    cache = ResponseCache()
+
+    if concurrency > 1:
+        generator = AsyncMCQGenerator(api_key, concurrency=concurrency, rate_limiter=rate_limiter, cache=cache)
+        results = asyncio.run(generator.generate_many(tqdm(mdx_files_data), num_questions=10,
+                                                      bypass_cache=bypass_cache, output_format=output_format,
+                                                      pages_dir=mdx_directory))
+        print(f"\nGenerated MCQs for {len(results)} files")
+        for path, questions in results.items():
             if questions:
-                print("\nGenerated MCQs:")
-                for i, q in enumerate(questions, 1):
-                    print(f"\nQuestion {i}: {q['question']}")
-                    for option, text in q['options'].items():
-                        print(f"  {option}. {text}")
-                    print(f"Correct answer: {q['correct_answer']}")
-            generator.save_to_file(questions, f"questions/{Path(file_data['path']).stem}.json")
+                manifest.record(path, output_path_for(path))
+    else:
+        generator = MCQGenerator(api_key, rate_limiter=rate_limiter, cache=cache)
+        for batch in pack_documents(tqdm(mdx_files_data)):
+            page_questions = generator.generate_batch(batch, num_questions=10, bypass_cache=bypass_cache)
+            for file_data, questions in zip(batch, page_questions):
+                print(f"\nFile: {file_data.path}")
+                print(f"Metadata: {file_data.metadata}")
+                # print(mcqs)
+        
+        # Print the generated questions
+                if questions:
+                    print("\nGenerated MCQs:")
+                    for i, q in enumerate(questions, 1):
+                        print(f"\nQuestion {i}: {q['question']}")
+                        for option, text in q['options'].items():
+                            print(f"  {option}. {text}")
+                        print(f"Correct answer: {q['correct_answer']}")
+                if questions:
+                    output_path = output_path_for(file_data.path)
+                    if generator.save_to_file(questions, output_path):
+                        manifest.record(file_data.path, output_path)
+
+    manifest.save()
+    cache.evict()
+    print(f"API requests: {rate_limiter.total_requests}, tokens: {rate_limiter.total_tokens}")
+    print(f"Response cache: {cache.stats()}")
+    print(f"Response extraction: {generator.metrics.stats()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,135 @@
+import os
+import json
+import struct
+
+
+# Sidecar index entries: one little-endian unsigned 64-bit byte offset per question
+OFFSET = struct.Struct("<Q")
+
+
+class QuestionBank:
+    def __init__(self, path):
+        """
+        Compact JSON-lines question file with a sidecar offset index.
+
+        Each question is one line of minified JSON. ``<path>.idx`` holds the byte
+        offset at which every line starts, so question ``i`` is read with two
+        seeks instead of parsing the whole file, and new questions are appended
+        without rewriting what is already there.
+
+        Args:
+            path (str): Path of the .jsonl file; the index lives at ``<path>.idx``
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+
+    @staticmethod
+    def _encode(question):
+        return (json.dumps(question, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def write(self, questions):
+        """Replace the bank's contents with ``questions``, swapping both files in atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        offset = 0
+        with open(f"{self.path}.tmp", "wb") as data, open(f"{self.index_path}.tmp", "wb") as index:
+            for question in questions:
+                line = self._encode(question)
+                index.write(OFFSET.pack(offset))
+                data.write(line)
+                offset += len(line)
+        # Index first: a crash between the two leaves a stale index that rebuild_index repairs
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def append(self, questions):
+        """
+        Append questions to the end of the bank.
+
+        Returns:
+            int: Number of questions in the bank afterwards
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not self._index_is_current():
+            self.rebuild_index()
+        with open(self.path, "ab") as data, open(self.index_path, "ab") as index:
+            offset = data.tell()
+            for question in questions:
+                line = self._encode(question)
+                data.write(line)
+                index.write(OFFSET.pack(offset))
+                offset += len(line)
+        return len(self)
+
+    def _index_is_current(self):
+        """Check the index ends exactly where the data file does."""
+        data_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if index_size % OFFSET.size:
+            return False
+        if not index_size:
+            return data_size == 0
+        with open(self.index_path, "rb") as index, open(self.path, "rb") as data:
+            index.seek(index_size - OFFSET.size)
+            data.seek(OFFSET.unpack(index.read(OFFSET.size))[0])
+            return data.readline().endswith(b"\n") and data.tell() == data_size
+
+    def rebuild_index(self):
+        """
+        Rewrite the offset index from a scan of the data file.
+
+        Returns:
+            int: Number of questions indexed
+        """
+        count = 0
+        offset = 0
+        with open(self.path, "rb") as data, open(self.index_path, "wb") as index:
+            for line in data:
+                if line.strip():
+                    index.write(OFFSET.pack(offset))
+                    count += 1
+                offset += len(line)
+        return count
+
+    def remove(self):
+        """
+        Delete the data file and its offset index.
+
+        Returns:
+            bool: True if the data file existed
+        """
+        existed = os.path.exists(self.path)
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return existed
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.index_path) // OFFSET.size
+        except OSError:
+            return 0
+
+    def __getitem__(self, i):
+        """Read question ``i`` (negative indexes count from the end) via the offset index."""
+        count = len(self)
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError(f"question index {i} out of range for {self.path}")
+        with open(self.index_path, "rb") as index:
+            index.seek(i * OFFSET.size)
+            offset = OFFSET.unpack(index.read(OFFSET.size))[0]
+        with open(self.path, "rb") as data:
+            data.seek(offset)
+            return json.loads(data.readline())
+
+    def __iter__(self):
+        """Stream every question in file order without touching the index."""
+        with open(self.path, "r", encoding="utf-8") as data:
+            for line in data:
+                if line.strip():
+                    yield json.loads(line)
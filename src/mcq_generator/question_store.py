@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import random
+import sqlite3
+from abc import ABC, abstractmethod
+from pymongo import ASCENDING
+from mongo_db_connect import (
+    QUESTION_INDEXES, connect_to_mongodb, get_json_files, get_username_password, validate_questions,
+    process_data, question_documents, iter_question_documents, bulk_upsert_questions, ensure_indexes,
+    reroll_random_keys, sample_questions, changed_questions, question_operations, flush_operations
+)
+
+
+# Backends selectable through the QUESTION_STORE environment variable
+BACKENDS = ("mongo", "sqlite")
+
+
+def _empty_counts():
+    return {"inserted": 0, "modified": 0, "unchanged": 0, "deleted": 0, "round_trips": 0}
+
+
+def topic_documents(key, questions):
+    """Validate and number a topic's raw questions and turn them into per-question documents."""
+    valid = validate_questions(key, questions)
+    return question_documents(key, process_data(key, valid)) if valid else []
+
+
+class QuestionStore(ABC):
+    """
+    Storage for the per-question layout, independent of where it lives.
+
+    Every backend holds one document per question keyed by (key, question_id)
+    and carrying a content_hash and a random sort key, and implements the same
+    operations so the pipeline and its benchmarks run unchanged against any of them.
+    """
+
+    @abstractmethod
+    def upsert(self, key, questions):
+        """
+        Replace one topic's questions, writing only those that changed.
+
+        Args:
+            key (str): Topic key
+            questions (list): Raw questions as produced by the generator
+
+        Returns:
+            dict: Counts of inserted, modified, unchanged and deleted questions and round trips used
+        """
+
+    @abstractmethod
+    def bulk_load(self, json_files, batch_size=500):
+        """
+        Stream every question file into the store in bounded batches.
+
+        Args:
+            json_files (list): Paths of .json or .jsonl question files
+            batch_size (int): Maximum questions written per batch
+
+        Returns:
+            dict: Counts of inserted, modified, unchanged and deleted questions and round trips used
+        """
+
+    @abstractmethod
+    def fetch(self, key):
+        """Return a topic's questions ordered by question_id."""
+
+    @abstractmethod
+    def sample(self, key, n=10):
+        """Return up to n random questions from a topic."""
+
+    def close(self):
+        """Release the backend's connection."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MongoQuestionStore(QuestionStore):
+    def __init__(self, client=None, database="interview_helper_db", collection="McqQuestions"):
+        """
+        Question store backed by the McqQuestions collection.
+
+        Args:
+            client: Existing MongoClient (defaults to connect_to_mongodb, which honours MONGO_URI)
+            database (str): Database name
+            collection (str): Per-question collection name
+        """
+        self.client = client or connect_to_mongodb()
+        if self.client is None:
+            raise ConnectionError("Could not connect to MongoDB")
+        self.collection = self.client[database][collection]
+        ensure_indexes(self.collection, QUESTION_INDEXES)
+
+    def upsert(self, key, questions):
+        counts = _empty_counts()
+        existing = {
+            doc["question_id"]: doc.get("content_hash")
+            for doc in self.collection.find({"key": key}, {"question_id": 1, "content_hash": 1, "_id": 0})
+        }
+        counts["round_trips"] += 1
+        operations = list(question_operations(key, topic_documents(key, questions), existing, counts))
+        flush_operations(self.collection, operations, counts)
+        return counts
+
+    def bulk_load(self, json_files, batch_size=500):
+        counts = bulk_upsert_questions(self.collection, json_files, batch_size=batch_size)
+        reroll_random_keys(self.collection, missing_only=True)
+        return counts
+
+    def fetch(self, key):
+        return list(self.collection.find({"key": key}, {"_id": 0, "rand": 0}).sort("question_id", ASCENDING))
+
+    def sample(self, key, n=10):
+        return sample_questions(self.collection, key, n)
+
+    def close(self):
+        self.client.close()
+
+
+class SQLiteQuestionStore(QuestionStore):
+    def __init__(self, path="questions.db"):
+        """
+        Question store in a single SQLite file, for offline runs and benchmarks.
+
+        Documents are stored as compact JSON next to the indexed (key, question_id),
+        content_hash and rand columns, mirroring the McqQuestions indexes.
+
+        Args:
+            path (str): Database file, or ":memory:" for a throwaway store
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS questions (
+                key TEXT NOT NULL,
+                question_id INTEGER NOT NULL,
+                source_file TEXT,
+                content_hash TEXT NOT NULL,
+                rand REAL NOT NULL,
+                document TEXT NOT NULL,
+                PRIMARY KEY (key, question_id)
+            );
+            CREATE INDEX IF NOT EXISTS source_file ON questions (source_file);
+            CREATE INDEX IF NOT EXISTS key_rand ON questions (key, rand);
+        """)
+
+    def _write(self, rows, deletes, counts):
+        """Apply one batch of upserted rows and (key, question_id) deletes in a single transaction."""
+        if not rows and not deletes:
+            return
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO questions (key, question_id, source_file, content_hash, rand, document)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key, question_id) DO UPDATE SET
+                    source_file = excluded.source_file,
+                    content_hash = excluded.content_hash,
+                    document = excluded.document
+            """, rows)
+            self.connection.executemany("DELETE FROM questions WHERE key = ? AND question_id = ?", deletes)
+        counts["deleted"] += len(deletes)
+        counts["round_trips"] += 1
+        rows.clear()
+        deletes.clear()
+
+    @staticmethod
+    def _row(document):
+        return (
+            document["key"], document["question_id"], document.get("source_file"), document["content_hash"],
+            random.random(), json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    def _stored_hashes(self, key=None):
+        query = "SELECT key, question_id, content_hash FROM questions"
+        params = ()
+        if key is not None:
+            query += " WHERE key = ?"
+            params = (key,)
+        return {(row[0], row[1]): row[2] for row in self.connection.execute(query, params)}
+
+    def _load(self, documents_by_key, batch_size, existing_hashes):
+        """Upsert changed documents and delete vanished ones for each (key, documents) pair."""
+        counts = _empty_counts()
+        stored_hashes_by_key = {}
+        for (key, question_id), content_hash in existing_hashes.items():
+            stored_hashes_by_key.setdefault(key, {})[question_id] = content_hash
+
+        rows, deletes = [], []
+        for key, documents in documents_by_key:
+            stored_hashes = stored_hashes_by_key.get(key, {})
+            try:
+                for document, stored_hash in changed_questions(documents, stored_hashes, counts):
+                    counts["modified" if stored_hash else "inserted"] += 1
+                    rows.append(self._row(document))
+                    if len(rows) >= batch_size:
+                        self._write(rows, deletes, counts)
+            except (OSError, ValueError) as e:
+                # Rows read before the error are still written, but a partial file says
+                # nothing about which questions were removed, so nothing is deleted
+                print(f"Skipping the rest of {key}: {e}")
+                continue
+            # What changed_questions left behind no longer exists in the file
+            deletes.extend((key, question_id) for question_id in sorted(stored_hashes))
+            if len(deletes) >= batch_size:
+                self._write(rows, deletes, counts)
+
+        self._write(rows, deletes, counts)
+        return counts
+
+    def upsert(self, key, questions):
+        counts = self._load([(key, topic_documents(key, questions))], len(questions) or 1, self._stored_hashes(key))
+        counts["round_trips"] += 1
+        return counts
+
+    def bulk_load(self, json_files, batch_size=500):
+        documents_by_key = (
+            (os.path.basename(json_file).rsplit('.', 1)[0], iter_question_documents(json_file))
+            for json_file in json_files
+        )
+        counts = self._load(documents_by_key, batch_size, self._stored_hashes())
+        counts["round_trips"] += 1
+        return counts
+
+    def fetch(self, key):
+        rows = self.connection.execute(
+            "SELECT document FROM questions WHERE key = ? ORDER BY question_id", (key,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def sample(self, key, n=10):
+        # Same wraparound walk over the (key, rand) index as sample_questions
+        start = random.random()
+        rows = self.connection.execute(
+            "SELECT document FROM questions WHERE key = ? AND rand >= ? ORDER BY rand LIMIT ?", (key, start, n)
+        ).fetchall()
+        if len(rows) < n:
+            rows += self.connection.execute(
+                "SELECT document FROM questions WHERE key = ? AND rand < ? ORDER BY rand LIMIT ?",
+                (key, start, n - len(rows))
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        self.connection.close()
+
+
+def open_question_store(backend=None, **options):
+    """
+    Open the question store selected by configuration.
+
+    The backend comes from ``backend`` or the QUESTION_STORE environment variable
+    (loaded from .env like the Mongo credentials) and defaults to "mongo". The
+    SQLite file is taken from QUESTION_STORE_PATH unless ``path`` is given.
+
+    Args:
+        backend (str): "mongo" or "sqlite"
+        **options: Passed to the backend's constructor
+
+    Returns:
+        QuestionStore: The opened store
+    """
+    get_username_password()
+    backend = (backend or os.environ.get("QUESTION_STORE") or "mongo").lower()
+    if backend == "sqlite":
+        options.setdefault("path", os.environ.get("QUESTION_STORE_PATH", "questions.db"))
+        return SQLiteQuestionStore(**options)
+    if backend == "mongo":
+        return MongoQuestionStore(**options)
+    raise ValueError(f"Unknown question store {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def main(folder_path, backend=None, batch_size=500):
+    """Load every question file in a folder into the configured question store."""
+    json_files = get_json_files(folder_path)
+    if not json_files:
+        print("No JSON files found in the folder.")
+        return
+
+    with open_question_store(backend) as store:
+        print(f"Loading {len(json_files)} question files into {type(store).__name__}")
+        counts = store.bulk_load(json_files, batch_size=batch_size)
+        print(f"Inserted {counts['inserted']}, modified {counts['modified']}, unchanged {counts['unchanged']}, "
+              f"deleted {counts['deleted']} questions in {counts['round_trips']} round trips.")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+
+# Rough characters-per-token ratio for English prose and code under the GPT-4 tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text, completion_tokens=0):
+    """
+    Estimate the tokens a chat request will be charged before it is sent.
+
+    Args:
+        text (str): Prompt text
+        completion_tokens (int): Expected number of completion tokens
+
+    Returns:
+        int: Estimated prompt plus completion tokens
+    """
+    return len(text) // CHARS_PER_TOKEN + 1 + completion_tokens
+
+
+class SimulatedClock:
+    def __init__(self, start=0.0):
+        """
+        Deterministic clock for exercising a RateLimiter without waiting in real time.
+
+        Pass ``clock.time``, ``clock.sleep`` and ``clock.sleep_async`` to the limiter
+        and sleeping simply moves the clock forward.
+
+        Args:
+            start (float): Initial clock reading in seconds
+        """
+        self.now = start
+
+    def time(self):
+        """Return the current simulated time in seconds."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock by ``seconds``."""
+        self.now += max(0.0, seconds)
+
+    async def sleep_async(self, seconds):
+        """Advance the clock to this caller's deadline, yielding to other tasks first."""
+        deadline = self.now + max(0.0, seconds)
+        await asyncio.sleep(0)
+        self.now = max(self.now, deadline)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=500, tokens_per_minute=10000,
+                 clock=time.monotonic, sleep=time.sleep, sleep_async=asyncio.sleep):
+        """
+        Token-bucket limiter for requests/minute and tokens/minute.
+
+        Both buckets start full and refill continuously. Callers reserve an
+        estimated token count up front with ``acquire``/``acquire_async`` and
+        correct it with ``record_usage`` once the real usage is known, so a single
+        instance can be shared by sync and async generators.
+
+        Args:
+            requests_per_minute (int): Request budget per minute
+            tokens_per_minute (int): Token budget per minute
+            clock (callable): Monotonic clock returning seconds
+            sleep (callable): Blocking sleep used by ``acquire``
+            sleep_async (callable): Coroutine sleep used by ``acquire_async``
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.sleep_async = sleep_async
+
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+        self.total_wait = 0.0
+        self.total_requests = 0
+        self.total_tokens = 0
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = max(0.0, now - self._last_refill)
+        self._last_refill = now
+        self._request_allowance = min(
+            self.requests_per_minute,
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            self.tokens_per_minute,
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    def _reserve(self, tokens):
+        """
+        Take one request and ``tokens`` tokens if both are available.
+
+        Returns:
+            float: 0 when the reservation succeeded, otherwise seconds to wait before retrying
+        """
+        # A request larger than the whole bucket could never be admitted otherwise
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            self._refill()
+            if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                self._request_allowance -= 1
+                self._token_allowance -= tokens
+                self.total_requests += 1
+                self.total_tokens += tokens
+                return 0.0
+
+            request_wait = max(0.0, 1 - self._request_allowance) * 60.0 / self.requests_per_minute
+            token_wait = max(0.0, tokens - self._token_allowance) * 60.0 / self.tokens_per_minute
+            return max(request_wait, token_wait)
+
+    def acquire(self, tokens=0):
+        """
+        Block until one request and ``tokens`` tokens fit in the budget.
+
+        Args:
+            tokens (int): Estimated tokens the request will consume
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            self.total_wait += wait
+            self.sleep(wait)
+
+    async def acquire_async(self, tokens=0):
+        """
+        Wait without blocking the event loop until the request fits in the budget.
+
+        Args:
+            tokens (int): Estimated tokens the request will consume
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            self.total_wait += wait
+            await self.sleep_async(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """
+        Correct a reservation once the response reports its real token usage.
+
+        Over-estimates are refunded and under-estimates are charged, which may
+        leave the token bucket in debt until it refills.
+
+        Args:
+            estimated_tokens (int): Tokens reserved by ``acquire``
+            actual_tokens (int): Tokens reported in ``response.usage``
+        """
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        with self._lock:
+            self._refill()
+            self._token_allowance = min(
+                self.tokens_per_minute,
+                self._token_allowance + estimated_tokens - actual_tokens
+            )
+            self.total_tokens += actual_tokens - estimated_tokens
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import hashlib
+
+
+class ResponseCache:
+    def __init__(self, directory=".mcq_cache", max_bytes=256 * 1024 * 1024, max_age_days=90):
+        """
+        Content-addressed on-disk cache for generated MCQs.
+
+        Entries are keyed by a hash of everything that determines the model's
+        output, so an unchanged page is never paid for twice.
+
+        Args:
+            directory (str): Directory holding the cache entries
+            max_bytes (int): Total size the cache is trimmed back to by ``evict``
+            max_age_days (float): Entries unused for longer than this are treated as misses and evicted
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, prompt, temperature, num_questions):
+        """
+        Build the cache key for a generation request.
+
+        Args:
+            model (str): Model name
+            prompt (str): Full prompt, which already embeds the MDX body
+            temperature (float): Sampling temperature
+            num_questions (int): Number of questions requested
+
+        Returns:
+            str: Hex SHA-256 digest identifying the request
+        """
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "temperature": temperature, "num_questions": num_questions},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Look up cached questions for a key.
+
+        Returns:
+            list or None: The cached questions, or None on a miss or expired entry
+        """
+        path = self._entry_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                self.misses += 1
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                questions = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # The mtime records the last use, so expiry and eviction drop the least recently used entries
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return questions
+
+    def set(self, key, questions):
+        """Store questions for a key, replacing any previous entry atomically."""
+        path = self._entry_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(questions, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry {key}: {e}")
+
+    def evict(self):
+        """
+        Remove expired entries, then the least recently used ones until under ``max_bytes``.
+
+        Returns:
+            int: Number of entries removed
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                stat = entry.stat()
+                if now - stat.st_mtime > self.max_age:
+                    os.remove(entry.path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def stats(self):
+        """Return hit/miss counters for the current run."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
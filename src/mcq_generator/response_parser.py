@@ -0,0 +1,237 @@
+import re
+import json
+from collections import namedtuple
+from rate_limiter import estimate_tokens
+
+
+# Where a JSON object can start: a brace followed by a key or by its own closing brace
+OBJECT_START_PATTERN = re.compile(r'\{\s*["}]')
+
+WHITESPACE_PATTERN = re.compile(r'\s*')
+
+# Questions located in a response, whether the array was closed, and the unparsed tail
+Extraction = namedtuple("Extraction", ["questions", "complete", "leftover"])
+
+
+def is_valid_question(question):
+    """Check a question has text, an options mapping and a correct_answer naming one of the options."""
+    return (
+        isinstance(question, dict)
+        and bool(question.get("question"))
+        and isinstance(question.get("options"), dict)
+        and question.get("correct_answer") in question["options"]
+    )
+
+
+class IncrementalArrayParser:
+    def __init__(self):
+        """
+        Incremental parser for a JSON array of objects arriving in pieces.
+
+        Feed it text deltas as they stream in; each element object is returned as
+        soon as its closing brace arrives, without waiting for the rest of the
+        array. Braces inside strings and escaped quotes are tracked, so only
+        structural braces delimit objects. Anything before the opening ``[`` is
+        skipped; a ``[`` only opens the array when the next non-whitespace
+        character is ``{`` or ``]``, so bracketed prose such as "the [10]
+        questions" in a preface is not mistaken for it.
+        """
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._opening = False
+        self._started = False
+        self.finished = False
+        self.malformed = 0
+
+    def feed(self, delta):
+        """
+        Consume the next piece of text.
+
+        Args:
+            delta (str): Newly arrived text
+
+        Returns:
+            list: Element objects completed by this delta, in order
+        """
+        completed = []
+        for char in delta:
+            if self.finished:
+                break
+            if not self._started:
+                if self._opening and not char.isspace():
+                    # Confirm or reset the candidate opening bracket
+                    self._started = char in "{]"
+                    self._opening = False
+                if not self._started:
+                    self._opening = self._opening or char == "["
+                    continue
+
+            if self._depth:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if not self._depth:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in "}]":
+                if not self._depth:
+                    # Closing bracket of the outer array
+                    self.finished = char == "]"
+                    continue
+                self._depth -= 1
+                if not self._depth:
+                    try:
+                        element = json.loads("".join(self._buffer))
+                    except ValueError:
+                        # Balanced but not valid JSON, e.g. a trailing comma; drop just this element
+                        element = None
+                        self.malformed += 1
+                    self._buffer = []
+                    if isinstance(element, dict):
+                        completed.append(element)
+        return completed
+
+    @property
+    def pending(self):
+        """Text of the element currently being received, if any."""
+        return "".join(self._buffer) if self._depth else ""
+
+
+def extract_questions(content):
+    """
+    Locate and parse the question array inside a possibly noisy model response.
+
+    Clean JSON takes the fast path. Otherwise prefaces and code fences around
+    the array are skipped, and a truncated array yields every element that was
+    completed before the cut. A single object wrapping the array, such as
+    ``{"questions": [...]}``, is unwrapped to whichever of its arrays holds the
+    most well-formed questions. Elements that are not well-formed questions are
+    dropped.
+
+    Args:
+        content (str): Message content returned by the model
+
+    Returns:
+        Extraction: Valid questions, whether the array was complete, and the text left unparsed
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        arrays = [value for value in data.values() if isinstance(value, list)]
+        data = max(arrays, key=lambda value: sum(map(is_valid_question, value)), default=None)
+    if isinstance(data, list):
+        return Extraction([question for question in data if is_valid_question(question)], True, "")
+
+    parser = IncrementalArrayParser()
+    elements = parser.feed(content or "")
+    questions = [question for question in elements if is_valid_question(question)]
+    return Extraction(questions, parser.finished, parser.pending)
+
+
+def _decode_members(content, start):
+    """
+    Decode an object's members one at a time from the brace at ``start``.
+
+    Returns:
+        tuple: (members decoded before the object closed or was cut off, whether it closed)
+    """
+    decoder = json.JSONDecoder()
+    members = {}
+    position = WHITESPACE_PATTERN.match(content, start + 1).end()
+    if content.startswith("}", position):
+        return members, True
+    while True:
+        try:
+            key, position = decoder.raw_decode(content, position)
+            position = WHITESPACE_PATTERN.match(content, position).end()
+            if not isinstance(key, str) or not content.startswith(":", position):
+                return members, False
+            value, position = decoder.raw_decode(content, WHITESPACE_PATTERN.match(content, position + 1).end())
+        except ValueError:
+            return members, False
+        members[key] = value
+        position = WHITESPACE_PATTERN.match(content, position).end()
+        if content.startswith("}", position):
+            return members, True
+        if not content.startswith(",", position):
+            return members, False
+        position = WHITESPACE_PATTERN.match(content, position + 1).end()
+
+
+def extract_object(content):
+    """
+    Locate and parse the JSON object inside a possibly noisy model response.
+
+    Parsing starts at the first brace that opens an object and stops where that
+    object ends, so braces in the prose before or after it are ignored. A
+    truncated object is decoded member by member, so every member completed
+    before the cut, e.g. each finished ``"doc-N": [...]`` of a packed response,
+    is kept.
+
+    Returns:
+        dict or None: The outermost object's complete members, or None if there is no object
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        match = OBJECT_START_PATTERN.search(content)
+        data = _decode_members(content, match.start())[0] if match else None
+    return data if isinstance(data, dict) else None
+
+
+class ExtractionMetrics:
+    def __init__(self):
+        """
+        Counters for how much of what the model returned could actually be used.
+
+        A request fails when nothing usable could be extracted from it; its
+        prompt and response are then wasted. For salvaged responses only the
+        unusable tail is counted. Token figures use the same estimate as the
+        rate limiter.
+        """
+        self.requests = 0
+        self.failed_requests = 0
+        self.salvaged_requests = 0
+        self.remainder_requests = 0
+        self.error_requests = 0
+        self.wasted_tokens = 0
+
+    def record(self, prompt, content, extraction):
+        """Record the outcome of one response."""
+        self.requests += 1
+        if not extraction.questions:
+            self.failed_requests += 1
+            self.wasted_tokens += estimate_tokens(prompt) + estimate_tokens(content or "")
+        elif not extraction.complete:
+            self.salvaged_requests += 1
+            self.wasted_tokens += estimate_tokens(extraction.leftover) if extraction.leftover else 0
+
+    def record_error(self):
+        """Record a request that raised before any response arrived, e.g. a rate-limit error or timeout."""
+        self.requests += 1
+        self.failed_requests += 1
+        self.error_requests += 1
+
+    def stats(self):
+        """Return the counters and the failed-call rate for the current run."""
+        return {
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "failure_rate": self.failed_requests / self.requests if self.requests else 0.0,
+            "salvaged_requests": self.salvaged_requests,
+            "remainder_requests": self.remainder_requests,
+            "error_requests": self.error_requests,
+            "wasted_tokens": self.wasted_tokens,
+        }
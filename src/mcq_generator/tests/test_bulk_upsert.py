@@ -0,0 +1,147 @@
+"""
+Tests for the bulk topic upload: counts, round trips and the skip-unchanged path.
+
+Runs against the mongod at MONGO_TEST_URI when it is set (a throwaway
+``mcq_test`` database is created and dropped), otherwise against an in-process
+mongomock stand-in; skipped when neither is available.
+
+    pip install mongomock
+    python -m unittest discover -s tests
+"""
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from mongo_db_connect import bulk_upsert, bulk_upsert_questions, content_hash, get_json_files, process_data
+except ImportError:
+    bulk_upsert = None
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+MONGO_TEST_URI = os.environ.get("MONGO_TEST_URI")
+
+TOPICS = 25
+BATCH_SIZE = 10
+
+
+def questions_for(topic, revision=0):
+    return [
+        {
+            "question": f"Topic {topic} question {j} revision {revision}?",
+            "options": {"A": "First", "B": "Second", "C": "Third", "D": "Fourth"},
+            "correct_answer": "ABCD"[j % 4],
+        }
+        for j in range(3)
+    ]
+
+
+@unittest.skipIf(bulk_upsert is None, "pymongo is not installed")
+@unittest.skipUnless(MONGO_TEST_URI or mongomock, "set MONGO_TEST_URI or install mongomock")
+class BulkUpsertTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for topic in range(TOPICS):
+            self.write_topic(topic)
+        self.json_files = get_json_files(self.directory)
+
+        if MONGO_TEST_URI:
+            from pymongo import MongoClient
+            self.client = MongoClient(MONGO_TEST_URI)
+        else:
+            self.client = mongomock.MongoClient()
+            self.accept_update_sort()
+        self.client.drop_database("mcq_test")
+        self.collection = self.client["mcq_test"]["Mcqs"]
+
+    def tearDown(self):
+        self.client.drop_database("mcq_test")
+        self.client.close()
+        shutil.rmtree(self.directory)
+
+    def accept_update_sort(self):
+        # pymongo 4.11 passes a sort option with every UpdateOne, which mongomock 4.3 does not know;
+        # it is always None here, so drop it
+        builder = mongomock.collection.BulkOperationBuilder
+        if "sort" in inspect.signature(builder.add_update).parameters:
+            return
+        add_update = builder.add_update
+
+        def add_update_without_sort(bulk, *args, sort=None, **kwargs):
+            return add_update(bulk, *args, **kwargs)
+
+        patcher = mock.patch.object(builder, "add_update", add_update_without_sort)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_topic(self, topic, revision=0):
+        with open(os.path.join(self.directory, f"topic-{topic}.json"), "w", encoding="utf-8") as f:
+            json.dump(questions_for(topic, revision), f)
+
+    def upsert(self, **options):
+        return bulk_upsert(self.collection, self.json_files, batch_size=BATCH_SIZE, **options)
+
+    def test_cold_load_inserts_every_topic_in_batches(self):
+        counts = self.upsert()
+        # One hash fetch, then ceil(25 / 10) bulk writes
+        self.assertEqual(counts, {"inserted": TOPICS, "modified": 0, "unchanged": 0, "deleted": 0, "round_trips": 4})
+        self.assertEqual(self.collection.count_documents({}), TOPICS)
+
+    def test_documents_round_trip(self):
+        self.upsert()
+        for topic in (0, 7, TOPICS - 1):
+            key = f"topic-{topic}"
+            expected = process_data(key, questions_for(topic))
+            document = self.collection.find_one({"key": key}, {"_id": 0})
+            self.assertEqual(document["questions"], expected)
+            self.assertEqual(document["content_hash"], content_hash(expected))
+
+    def test_unchanged_reload_sends_no_writes(self):
+        self.upsert()
+        counts = self.upsert()
+        self.assertEqual(counts, {"inserted": 0, "modified": 0, "unchanged": TOPICS, "deleted": 0, "round_trips": 1})
+
+    def test_only_changed_topics_are_written(self):
+        self.upsert()
+        self.write_topic(3, revision=1)
+        counts = self.upsert()
+        self.assertEqual(counts, {"inserted": 0, "modified": 1, "unchanged": TOPICS - 1, "deleted": 0,
+                                  "round_trips": 2})
+        stored = self.collection.find_one({"key": "topic-3"})
+        self.assertEqual(stored["questions"], process_data("topic-3", questions_for(3, revision=1)))
+
+    def test_without_skip_every_topic_is_written(self):
+        self.upsert()
+        counts = self.upsert(skip_unchanged=False)
+        # Identical documents match without being modified, and no hash fetch is made
+        self.assertEqual(counts, {"inserted": 0, "modified": 0, "unchanged": TOPICS, "deleted": 0, "round_trips": 3})
+
+    def test_concurrent_workers_give_the_same_counts(self):
+        counts = self.upsert(workers=4)
+        self.assertEqual(counts, {"inserted": TOPICS, "modified": 0, "unchanged": 0, "deleted": 0, "round_trips": 4})
+        self.assertEqual(self.upsert(workers=4)["unchanged"], TOPICS)
+
+    def test_per_question_reload_deletes_only_removed_questions(self):
+        questions = self.client["mcq_test"]["McqQuestions"]
+        counts = bulk_upsert_questions(questions, self.json_files, batch_size=BATCH_SIZE)
+        self.assertEqual((counts["inserted"], counts["deleted"]), (TOPICS * 3, 0))
+
+        with open(os.path.join(self.directory, "topic-3.json"), "w", encoding="utf-8") as f:
+            json.dump(questions_for(3, revision=1)[:2], f)
+        counts = bulk_upsert_questions(questions, self.json_files, batch_size=BATCH_SIZE)
+        self.assertEqual((counts["modified"], counts["unchanged"], counts["deleted"]), (2, TOPICS * 3 - 3, 1))
+        self.assertEqual(sorted(questions.distinct("question_id", {"key": "topic-3"})), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
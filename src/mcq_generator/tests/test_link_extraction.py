@@ -0,0 +1,54 @@
+"""
+Tests for streaming links out of MDX bodies, fenced code blocks excluded.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from mdx_reader import Link, LocalMDXReader, MdxDocument
+except ImportError:
+    LocalMDXReader = None
+
+FRONTMATTER = "---\ntitle: Links\n---\n"
+
+
+def links_in(body):
+    document = MdxDocument("page.mdx", FRONTMATTER + body, {}, body_start=len(FRONTMATTER))
+    return list(LocalMDXReader().iter_links([document]))
+
+
+@unittest.skipIf(LocalMDXReader is None, "openai is not installed")
+class IterLinksTest(unittest.TestCase):
+    def test_every_kind_outside_fences(self):
+        body = 'See [the guide](/guide).\n![diagram](/d.svg) and <a href="/docs">docs</a>\n'
+        self.assertEqual(links_in(body), [
+            Link("page.mdx", "the guide", "/guide", "markdown"),
+            Link("page.mdx", "diagram", "/d.svg", "image"),
+            Link("page.mdx", "docs", "/docs", "html"),
+        ])
+
+    def test_longer_fence_contains_shorter_ones(self):
+        body = "````md\n```js\n[inside](/inside)\n```\n[still inside](/still)\n````\n[after](/after)\n"
+        self.assertEqual([link.url for link in links_in(body)], ["/after"])
+
+    def test_indented_tilde_fence(self):
+        body = "  ~~~\n[inside](/inside)\n   ~~~ \n[after](/after)\n"
+        self.assertEqual([link.url for link in links_in(body)], ["/after"])
+
+    def test_unclosed_fence_runs_to_the_end(self):
+        body = "[before](/before)\n```\n[inside](/inside)\n"
+        self.assertEqual([link.url for link in links_in(body)], ["/before"])
+
+    def test_frontmatter_is_not_scanned(self):
+        frontmatter = "---\nsee: '[x](/meta)'\n---\n"
+        document = MdxDocument("page.mdx", frontmatter + "No links.\n", {}, body_start=len(frontmatter))
+        self.assertEqual(list(LocalMDXReader().iter_links([document])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests for request handling in the MCQ generators, driven by a scripted fake client.
+
+    python -m unittest discover -s tests
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from mdx_reader import MCQGenerator, AsyncMCQGenerator
+except ImportError:
+    MCQGenerator = None
+
+
+def question(i):
+    return {"question": f"Question {i}?", "options": {"A": "yes", "B": "no"}, "correct_answer": "A"}
+
+
+# Two complete questions, then the response is cut off mid-element
+TRUNCATED = "[" + ",".join(json.dumps(question(i)) for i in range(2)) + ', {"question": "Quest'
+
+
+def response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class ScriptedClient:
+    """Answers each request with the next scripted reply; exceptions are raised instead of returned."""
+
+    def __init__(self, replies, is_async=False):
+        self.replies = list(replies)
+        create = self.create_async if is_async else self.create
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    def create(self, **request):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return response(reply)
+
+    async def create_async(self, **request):
+        # Yield to the loop as a real request would, so concurrent callers interleave
+        await asyncio.sleep(0)
+        return self.create(**request)
+
+
+class FakeGenerator(MCQGenerator if MCQGenerator else object):
+    """Generator whose scripted replies are passed in place of the API key."""
+
+    def create_client(self, api_key):
+        return ScriptedClient(api_key)
+
+
+class FakeAsyncGenerator(AsyncMCQGenerator if MCQGenerator else object):
+    """Async generator whose scripted replies are passed in place of the API key."""
+
+    def create_client(self, api_key):
+        return ScriptedClient(api_key, is_async=True)
+
+
+@unittest.skipIf(MCQGenerator is None, "openai is not installed")
+class RemainderRequestTest(unittest.TestCase):
+    def test_failed_remainder_keeps_salvaged_questions(self):
+        generator = FakeGenerator([TRUNCATED, TimeoutError("timed out")])
+        self.assertEqual(generator.generate_mcqs("Some text", 5), [question(0), question(1)])
+        stats = generator.metrics.stats()
+        self.assertEqual((stats["requests"], stats["failed_requests"], stats["error_requests"]), (2, 1, 1))
+
+    def test_failed_remainder_keeps_salvaged_questions_async(self):
+        generator = FakeAsyncGenerator([TRUNCATED, TimeoutError("timed out")])
+        questions = asyncio.run(generator.generate_mcqs("Some text", 5))
+        self.assertEqual(questions, [question(0), question(1)])
+        self.assertEqual(generator.metrics.stats()["error_requests"], 1)
+
+    def test_remainder_fills_the_missing_questions(self):
+        remainder = json.dumps([question(i) for i in range(2, 5)])
+        generator = FakeGenerator([TRUNCATED, remainder])
+        self.assertEqual(generator.generate_mcqs("Some text", 5), [question(i) for i in range(5)])
+
+    def test_request_slots_follow_the_running_loop(self):
+        replies = [json.dumps([question(i)]) for i in range(4)]
+        generator = FakeAsyncGenerator(replies, concurrency=1)
+
+        async def two_pages():
+            # With one slot the second request waits, which binds the semaphore to this loop
+            return await asyncio.gather(generator.generate_mcqs("Page one", 1),
+                                        generator.generate_mcqs("Page two", 1))
+
+        self.assertEqual(asyncio.run(two_pages()), [[question(0)], [question(1)]])
+        self.assertEqual(asyncio.run(two_pages()), [[question(2)], [question(3)]])
+        self.assertEqual(generator.metrics.stats()["error_requests"], 0)
+
+    def test_failed_first_request_is_counted(self):
+        generator = FakeGenerator([ConnectionError("rate limited")])
+        self.assertEqual(generator.generate_mcqs("Some text", 5), [])
+        self.assertEqual(generator.metrics.stats()["failure_rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
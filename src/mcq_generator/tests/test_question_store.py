@@ -0,0 +1,55 @@
+"""
+Tests for loading question files into the SQLite question store.
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from question_store import SQLiteQuestionStore
+except ImportError:
+    SQLiteQuestionStore = None
+
+
+def question(i, revision=0):
+    return {"question": f"Question {i} revision {revision}?", "options": {"A": "yes", "B": "no"},
+            "correct_answer": "A"}
+
+
+@unittest.skipIf(SQLiteQuestionStore is None, "pymongo is not installed")
+class BulkLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "topic.json")
+        self.store = SQLiteQuestionStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_truncated_file_keeps_questions_before_the_damage(self):
+        self.write(json.dumps([question(i) for i in range(3)]))
+        self.assertEqual(self.store.bulk_load([self.path])["inserted"], 3)
+
+        # The first question changed; the file was cut off inside the second
+        self.write(json.dumps([question(0, revision=1), question(1), question(2)])[:120])
+        counts = self.store.bulk_load([self.path])
+        self.assertEqual((counts["modified"], counts["deleted"]), (1, 0))
+        stored = self.store.fetch("topic")
+        self.assertEqual([q["question_id"] for q in stored], [1, 2, 3])
+        self.assertEqual(stored[0]["question"], question(0, revision=1)["question"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Tests for expiry and eviction in the on-disk response cache.
+
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import ResponseCache
+
+DAY = 24 * 60 * 60
+
+
+class EvictionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory, max_age_days=30)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, key, days_ago):
+        self.cache.set(key, [{"question": key}])
+        written = time.time() - days_ago * DAY
+        os.utime(self.cache._entry_path(key), (written, written))
+
+    def test_hit_keeps_an_old_entry_alive(self):
+        self.write("aa" * 32, days_ago=29)
+        self.write("bb" * 32, days_ago=29)
+        self.assertIsNotNone(self.cache.get("aa" * 32))
+
+        # Only the entry that was not read since being written has gone unused for a week
+        self.cache.max_age = 7 * DAY
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertTrue(os.path.exists(self.cache._entry_path("aa" * 32)))
+
+    def test_size_eviction_drops_the_least_recently_used(self):
+        self.write("aa" * 32, days_ago=3)
+        self.write("bb" * 32, days_ago=2)
+        self.assertIsNotNone(self.cache.get("aa" * 32))
+
+        self.cache.max_bytes = os.path.getsize(self.cache._entry_path("aa" * 32))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNotNone(self.cache.get("aa" * 32))
+        self.assertIsNone(self.cache.get("bb" * 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for locating questions in noisy model responses.
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_parser import IncrementalArrayParser, extract_questions, extract_object
+
+
+def question(text, answer="A"):
+    return {"question": text, "options": {"A": "yes", "B": "no"}, "correct_answer": answer}
+
+
+QUESTIONS = [question("What is [x]?"), question("Is {y} a set?", "B")]
+
+
+class IncrementalArrayParserTest(unittest.TestCase):
+    def feed_chars(self, text):
+        parser = IncrementalArrayParser()
+        elements = []
+        for char in text:
+            elements.extend(parser.feed(char))
+        return parser, elements
+
+    def test_bracketed_preface_is_not_the_array(self):
+        parser, elements = self.feed_chars(f"Here are the [10] questions:\n{json.dumps(QUESTIONS)}")
+        self.assertEqual(elements, QUESTIONS)
+        self.assertTrue(parser.finished)
+
+    def test_nested_bracket_resets_to_the_inner_array(self):
+        parser, elements = self.feed_chars(f"[[ {json.dumps(QUESTIONS[0])}]]")
+        self.assertEqual(elements, QUESTIONS[:1])
+
+    def test_truncated_array_keeps_completed_elements(self):
+        text = json.dumps(QUESTIONS)
+        parser, elements = self.feed_chars(text[:-10])
+        self.assertEqual(elements, QUESTIONS[:1])
+        self.assertFalse(parser.finished)
+        self.assertTrue(parser.pending.startswith("{"))
+
+
+class ExtractQuestionsTest(unittest.TestCase):
+    def test_clean_array(self):
+        extraction = extract_questions(json.dumps(QUESTIONS))
+        self.assertEqual(extraction.questions, QUESTIONS)
+        self.assertTrue(extraction.complete)
+
+    def test_preface_with_brackets_and_code_fence(self):
+        content = f"Here are the [2] questions:\n```json\n{json.dumps(QUESTIONS, indent=2)}\n```\nEnjoy!"
+        extraction = extract_questions(content)
+        self.assertEqual(extraction.questions, QUESTIONS)
+        self.assertTrue(extraction.complete)
+
+    def test_wrapper_prefers_the_array_of_questions(self):
+        content = json.dumps({"meta": ["generated", "v1"], "questions": QUESTIONS})
+        self.assertEqual(extract_questions(content).questions, QUESTIONS)
+
+    def test_invalid_elements_are_dropped(self):
+        content = json.dumps(QUESTIONS + [{"question": "No options"}, question("Bad answer", "Z")])
+        self.assertEqual(extract_questions(content).questions, QUESTIONS)
+
+    def test_truncated_response_is_incomplete(self):
+        extraction = extract_questions("Sure: " + json.dumps(QUESTIONS)[:-20])
+        self.assertEqual(extraction.questions, QUESTIONS[:1])
+        self.assertFalse(extraction.complete)
+        self.assertTrue(extraction.leftover)
+
+    def test_no_array(self):
+        extraction = extract_questions("I cannot help with that.")
+        self.assertEqual(extraction.questions, [])
+        self.assertFalse(extraction.complete)
+
+
+class ExtractObjectTest(unittest.TestCase):
+    def test_trailing_prose_with_braces(self):
+        answers = {"doc-1": QUESTIONS}
+        content = f"Here you go {{as requested}}:\n{json.dumps(answers)}\nUse {{doc-id}} to match pages."
+        self.assertEqual(extract_object(content), answers)
+
+    def test_truncated_object_keeps_complete_members(self):
+        content = "Answers:\n" + json.dumps({"doc-1": QUESTIONS, "doc-2": QUESTIONS[:1], "doc-3": QUESTIONS})
+        self.assertEqual(extract_object(content[:-30]), {"doc-1": QUESTIONS, "doc-2": QUESTIONS[:1]})
+
+    def test_object_cut_before_any_member(self):
+        self.assertEqual(extract_object('Here: {"doc-1": [{"question": "Wh'), {})
+
+    def test_no_object(self):
+        self.assertIsNone(extract_object("[1, 2, 3]"))
+
+
+if __name__ == "__main__":
+    unittest.main()